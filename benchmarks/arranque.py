@@ -0,0 +1,102 @@
+"""Mide el tiempo de arranque de bingo.py con `python -X importtime` y falla si supera
+un umbral o si al importar el módulo se cargan dependencias pesadas que solo deberían
+importarse en los caminos que las usan (reportlab, spotipy, requests, numpy...).
+
+Uso:
+    python benchmarks/arranque.py                 # umbral por defecto
+    python benchmarks/arranque.py --umbral-ms 80  # umbral más estricto
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que `import bingo` no debe cargar por sí solo
+MODULOS_PESADOS = ('reportlab', 'spotipy', 'requests', 'numpy', 'pandas', 'pypdf', 'multiprocessing')
+
+
+def medir_importtime(repeticiones):
+    """Devuelve la mediana del tiempo acumulado de `import bingo` (ms) y los módulos
+    más lentos que importa, según -X importtime"""
+    totales = []
+    modulos = {}
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import bingo'],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stderr
+        lineas = [linea for linea in salida.splitlines() if linea.startswith('import time:') and '|' in linea]
+        # Las importaciones de bingo son las que van justo antes de su propia línea
+        # y tienen más sangría que ella
+        fin = next(i for i, linea in enumerate(lineas) if linea.split('|')[2].strip() == 'bingo')
+        totales.append(int(lineas[fin].split('|')[1]) / 1000)
+        sangria_bingo = len(lineas[fin].split('|')[2]) - len(lineas[fin].split('|')[2].lstrip())
+        for linea in reversed(lineas[:fin]):
+            _, acumulado, nombre = linea.split('|')
+            sangria = len(nombre) - len(nombre.lstrip())
+            if sangria <= sangria_bingo:
+                break
+            if sangria == sangria_bingo + 2:
+                modulos.setdefault(nombre.strip(), []).append(int(acumulado) / 1000)
+    mas_lentos = sorted(((statistics.median(t), nombre) for nombre, t in modulos.items()), reverse=True)
+    return statistics.median(totales), mas_lentos
+
+
+def modulos_pesados_cargados():
+    """Lista los módulos pesados que quedan en sys.modules tras `import bingo`"""
+    codigo = ("import sys, bingo; print(' '.join(m for m in %r if m in sys.modules))" % (MODULOS_PESADOS,))
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ,
+                            capture_output=True, text=True, check=True).stdout
+    return salida.split()
+
+
+def medir_ayuda(repeticiones):
+    """Mediana del tiempo de reloj (ms) de `python bingo.py --help`, intérprete incluido"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(RAIZ, 'bingo.py'), '--help'],
+                       capture_output=True, check=True)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de arranque de bingo.py')
+    parser.add_argument('--umbral-ms', type=float, default=100,
+                        help='Tiempo máximo de `import bingo` (acumulado, en ms)')
+    parser.add_argument('--repeticiones', type=int, default=7, help='Ejecuciones por medida (se usa la mediana)')
+    parser.add_argument('--top', type=int, default=8, help='Importaciones más lentas a mostrar')
+    args = parser.parse_args()
+
+    # Una importación previa deja el .pyc al día para no medir la compilación
+    subprocess.run([sys.executable, '-c', 'import bingo'], cwd=RAIZ, check=True)
+
+    importacion, mas_lentos = medir_importtime(args.repeticiones)
+    pesados = modulos_pesados_cargados()
+    ayuda = medir_ayuda(args.repeticiones)
+
+    print(f"⏱️ import bingo: {importacion:.1f} ms (umbral {args.umbral_ms:.0f} ms)")
+    print(f"⏱️ bingo.py --help: {ayuda:.0f} ms (con arranque del intérprete)")
+    print("🐢 Importaciones más lentas:")
+    for tiempo, nombre in mas_lentos[:args.top]:
+        print(f"   {tiempo:7.1f} ms  {nombre}")
+
+    fallos = []
+    if importacion > args.umbral_ms:
+        fallos.append(f"import bingo tarda {importacion:.1f} ms (> {args.umbral_ms:.0f} ms)")
+    if pesados:
+        fallos.append(f"import bingo carga dependencias pesadas: {', '.join(pesados)}")
+    for fallo in fallos:
+        print(f"❌ {fallo}")
+    if not fallos:
+        print("✅ Arranque dentro del umbral")
+    return 1 if fallos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Benchmark reproducible de generación de cartones: tiempo, cartones/s, pico de memoria
+y tamaño del PDF, sin red, con listas de canciones sintéticas (títulos cortos, con
+acentos y muy largos) y barriendo --por-pagina y el número de cartones.
+
+Uso:
+    python benchmarks/generacion.py ejecutar --salida resultados.json
+    python benchmarks/generacion.py ejecutar --cartones 10 100 --por-pagina 2 --salida rapido.json
+    python benchmarks/generacion.py comparar resultados.json --base linea_base.json --umbral 10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEMILLA = 2024
+
+PALABRAS = ('love', 'night', 'dance', 'heart', 'fire', 'queen', 'dream', 'rainbow', 'free',
+            'star', 'gold', 'wild', 'baby', 'summer', 'light', 'forever', 'tonight', 'girls')
+PALABRAS_ACENTOS = ('corazón', 'canción', 'pasión', 'mañana', 'España', 'años', 'ilusión',
+                    'último', 'bailaré', 'pequeña', 'Göttingen', 'façade', 'Zoë', 'cœur',
+                    'Ñandú', 'über', 'São', 'Ólafur', 'Beyoncé', '¿dónde?', '¡olé!')
+COLETILLAS = (' - Remastered 2011', ' (feat. Dua Lipa & Elton John)', ' - Radio Edit',
+              ' (Extended Club Mix)', ' - Live at Wembley Stadium, 1986', ' [Deluxe Edition]')
+
+# nombre -> (canciones, generador de títulos)
+LISTAS = {
+    'cortos': (60, lambda r: ' '.join(r.choice(PALABRAS) for _ in range(r.randint(1, 3))).title()),
+    'acentos': (500, lambda r: ' '.join(r.choice(PALABRAS_ACENTOS + PALABRAS)
+                                        for _ in range(r.randint(2, 6))).capitalize()),
+    'largos': (2000, lambda r: ' '.join(r.choice(PALABRAS_ACENTOS + PALABRAS)
+                                        for _ in range(r.randint(6, 12))).title()
+               + ''.join(r.sample(COLETILLAS, 2))),
+}
+
+# Métricas que se comparan con la línea base (todas: cuanto más, peor)
+METRICAS = ('tiempo_s', 'pico_rss_mb', 'bytes_pdf')
+# Por debajo de estas diferencias absolutas no se avisa (ruido de arranque y de medida)
+TOLERANCIA_ABSOLUTA = {'tiempo_s': 0.05, 'pico_rss_mb': 2.0, 'bytes_pdf': 1024}
+
+
+def escribir_lista(directorio, nombre):
+    """Crea (siempre igual) la lista sintética `nombre` y devuelve su ruta"""
+    cantidad, titulo = LISTAS[nombre]
+    aleatorio = random.Random(f"{SEMILLA}:{nombre}")
+    titulos = []
+    vistos = set()
+    while len(titulos) < cantidad:
+        candidato = titulo(aleatorio)
+        if candidato not in vistos:
+            vistos.add(candidato)
+            titulos.append(candidato)
+    ruta = os.path.join(directorio, f"{nombre}.txt")
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write('\n'.join(titulos) + '\n')
+    return ruta
+
+
+def medir_caso(directorio, canciones, cartones, por_pagina, motor, extra):
+    """Ejecuta bingo.py una vez con --perfil y devuelve sus métricas"""
+    salida = os.path.join(directorio, 'salida.pdf')
+    perfil = os.path.join(directorio, 'perfil.json')
+    comando = [sys.executable, os.path.join(RAIZ, 'bingo.py'), '-c', canciones,
+               '-n', str(cartones), '--por-pagina', str(por_pagina), '--motor', motor,
+               '--semilla', str(SEMILLA), '-o', salida, '--perfil', perfil] + extra
+    inicio = time.perf_counter()
+    resultado = subprocess.run(comando, cwd=directorio, capture_output=True, text=True)
+    tiempo = time.perf_counter() - inicio
+    if resultado.returncode != 0 or not os.path.exists(perfil):
+        raise RuntimeError(f"Falló {' '.join(comando)}:\n{resultado.stdout[-2000:]}{resultado.stderr[-2000:]}")
+    with open(perfil, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    os.remove(perfil)
+    return {
+        'tiempo_s': tiempo,
+        'generacion_s': datos['fases_s'].get('generacion_pdf'),
+        'pico_rss_mb': datos['pico_rss_mb'],
+        'bytes_pdf': datos['contadores']['bytes_pdf'],
+    }
+
+
+def ejecutar(args):
+    casos = []
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = {nombre: escribir_lista(directorio, nombre) for nombre in args.listas}
+        total = len(args.listas) * len(args.por_pagina) * len(args.cartones) * len(args.motores)
+        for nombre in args.listas:
+            for motor in args.motores:
+                for por_pagina in args.por_pagina:
+                    for cartones in args.cartones:
+                        medidas = [medir_caso(directorio, rutas[nombre], cartones, por_pagina, motor, args.extra)
+                                   for _ in range(args.repeticiones)]
+                        caso = {
+                            'id': f"{nombre}/{motor}/pp{por_pagina}/n{cartones}",
+                            'lista': nombre,
+                            'canciones': LISTAS[nombre][0],
+                            'motor': motor,
+                            'por_pagina': por_pagina,
+                            'cartones': cartones,
+                        }
+                        # Mediana de cada métrica entre repeticiones
+                        for metrica in ('tiempo_s', 'generacion_s', 'pico_rss_mb', 'bytes_pdf'):
+                            caso[metrica] = round(statistics.median(m[metrica] for m in medidas), 4)
+                        caso['cartones_por_s'] = round(cartones / caso['generacion_s'], 2)
+                        casos.append(caso)
+                        print(f"  ⏱️ [{len(casos)}/{total}] {caso['id']}: {caso['tiempo_s']:.2f} s, "
+                              f"{caso['cartones_por_s']:.0f} cartones/s, {caso['pico_rss_mb']:.0f} MB, "
+                              f"{caso['bytes_pdf'] / 1024:.0f} KiB", flush=True)
+
+    # Con los dos motores, cuántas veces más cartones/s genera canvas en cada caso
+    if {'platypus', 'canvas'} <= set(args.motores):
+        por_id = {caso['id']: caso for caso in casos}
+        for caso in casos:
+            if caso['motor'] == 'canvas':
+                base = por_id[caso['id'].replace('/canvas/', '/platypus/')]
+                print(f"  🏎️ {caso['id'].replace('/canvas', '')}: canvas ×{caso['cartones_por_s'] / base['cartones_por_s']:.1f} "
+                      f"({caso['cartones_por_s']:.0f} frente a {base['cartones_por_s']:.0f} cartones/s)")
+
+    resultados = {
+        'version': 1,
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'repeticiones': args.repeticiones,
+        'opciones_extra': args.extra,
+        'casos': casos,
+    }
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultados, archivo, ensure_ascii=False, indent=2)
+    print(f"📈 {len(casos)} casos guardados en '{args.salida}'")
+    return 0
+
+
+def comparar(args):
+    with open(args.resultados, encoding='utf-8') as archivo:
+        datos_actuales = json.load(archivo)
+    with open(args.base, encoding='utf-8') as archivo:
+        datos_base = json.load(archivo)
+    actuales = {caso['id']: caso for caso in datos_actuales['casos']}
+    base = {caso['id']: caso for caso in datos_base['casos']}
+    if datos_actuales.get('opciones_extra') != datos_base.get('opciones_extra'):
+        print(f"⚠️ Opciones distintas: {datos_actuales.get('opciones_extra')} frente a "
+              f"{datos_base.get('opciones_extra')} en la línea base")
+
+    comunes = [id_caso for id_caso in actuales if id_caso in base]
+    if not comunes:
+        print("❌ Los resultados y la línea base no tienen ningún caso en común")
+        return 1
+
+    regresiones = []
+    print(f"{'caso':<28} " + ' '.join(f"{metrica:>22}" for metrica in METRICAS))
+    for id_caso in comunes:
+        celdas = []
+        for metrica in METRICAS:
+            antes, ahora = base[id_caso][metrica], actuales[id_caso][metrica]
+            cambio = (ahora - antes) / antes * 100 if antes else 0.0
+            marca = ' '
+            if cambio > args.umbral and ahora - antes > TOLERANCIA_ABSOLUTA[metrica]:
+                marca = '!'
+                regresiones.append(f"{id_caso} {metrica}: {antes} → {ahora} ({cambio:+.1f} %)")
+            celdas.append(f"{ahora:>12.6g} ({cambio:+6.1f}%){marca}")
+        print(f"{id_caso:<28} " + ' '.join(celdas))
+
+    sin_base = len(actuales) - len(comunes)
+    if sin_base:
+        print(f"ℹ️ {sin_base} casos sin equivalente en la línea base")
+    for regresion in regresiones:
+        print(f"❌ {regresion}")
+    if not regresiones:
+        print(f"✅ Sin regresiones de más del {args.umbral:.0f} % en {len(comunes)} casos")
+    return 1 if regresiones else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de generación de cartones de bingo.py')
+    subparsers = parser.add_subparsers(dest='orden', required=True)
+
+    parser_ejecutar = subparsers.add_parser('ejecutar', help='Mide los casos y guarda los resultados en JSON')
+    parser_ejecutar.add_argument('--salida', default='resultados_generacion.json', help='Archivo JSON de resultados')
+    parser_ejecutar.add_argument('--listas', nargs='+', choices=list(LISTAS), default=list(LISTAS),
+                                 help='Listas sintéticas de canciones a usar')
+    parser_ejecutar.add_argument('--cartones', nargs='+', type=int, default=[10, 100, 1000, 10000],
+                                 help='Números de cartones a barrer')
+    parser_ejecutar.add_argument('--por-pagina', nargs='+', type=int, choices=[1, 2, 4], default=[1, 2, 4],
+                                 help='Cartones por página a barrer')
+    parser_ejecutar.add_argument('--motores', nargs='+', choices=['platypus', 'canvas'], default=['platypus'],
+                                 help='Motores de renderizado a medir')
+    parser_ejecutar.add_argument('--repeticiones', type=int, default=1,
+                                 help='Ejecuciones por caso (se guarda la mediana)')
+    parser_ejecutar.add_argument('--extra', nargs=argparse.REMAINDER, default=[],
+                                 help='Opciones adicionales para bingo.py (al final, p. ej. --extra --ajustar-texto)')
+    parser_ejecutar.set_defaults(funcion=ejecutar)
+
+    parser_comparar = subparsers.add_parser('comparar', help='Compara unos resultados con una línea base')
+    parser_comparar.add_argument('resultados', help='JSON de resultados actuales')
+    parser_comparar.add_argument('--base', required=True, help='JSON de la línea base')
+    parser_comparar.add_argument('--umbral', type=float, default=10,
+                                 help='Empeoramiento máximo permitido en cada métrica (%%)')
+    parser_comparar.set_defaults(funcion=comparar)
+
+    args = parser.parse_args()
+    return args.funcion(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
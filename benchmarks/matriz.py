@@ -0,0 +1,71 @@
+"""Compara el sorteo de cartones uno a uno con la matriz NumPy por bloques de
+--matriz-cartones: tiempo de sortear las canciones y colores de todos los cartones y de
+escribir su manifiesto, con 1000, 10.000 y 100.000 cartones de una lista de 2000 canciones.
+
+Uso:
+    python benchmarks/matriz.py
+    python benchmarks/matriz.py --cartones 1000 10000 --canciones 500
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from generacion import LISTAS, RAIZ, SEMILLA
+
+sys.path.insert(0, RAIZ)
+
+import bingo  # noqa: E402
+
+
+def crear_generador(canciones, matriz):
+    """Generador con la lista sintética y semilla fija (sin sus mensajes de arranque)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return bingo.GeneradorBingoMusicalPride(canciones=canciones, semilla=SEMILLA, matriz_cartones=matriz)
+
+
+def medir(canciones, matriz, cartones, directorio):
+    """Devuelve (segundos del sorteo de todos los cartones, segundos del manifiesto)"""
+    generador = crear_generador(canciones, matriz)
+    inicio = time.perf_counter()
+    for numero in range(1, cartones + 1):
+        generador.sortear_indices_carton(numero)
+        generador.sortear_colores_carton(numero)
+    sorteo = time.perf_counter() - inicio
+
+    # El manifiesto vuelve a sortear cada cartón: con una caché de bloques vacía
+    generador = crear_generador(canciones, matriz)
+    inicio = time.perf_counter()
+    bingo.ManifiestoCartones.escribir(os.path.join(directorio, 'tirada.manifiesto'), generador, cartones)
+    return sorteo, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de --matriz-cartones de bingo.py')
+    parser.add_argument('--cartones', nargs='+', type=int, default=[1000, 10000, 100000],
+                        help='Números de cartones a medir')
+    parser.add_argument('--canciones', type=int, default=2000, help='Canciones de la lista sintética')
+    args = parser.parse_args()
+    import numpy  # noqa: F401  (se importa antes para no medir la importación en el primer bloque)
+
+    aleatorio = random.Random(f"{SEMILLA}:matriz")
+    _, titulo = LISTAS['acentos']
+    canciones = [f"{titulo(aleatorio)} {numero}" for numero in range(args.canciones)]
+
+    print(f"{'cartones':>9} {'uno a uno':>11} {'matriz':>9} {'×':>6} {'manifiesto':>12} {'matriz':>9} {'×':>6}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for cartones in args.cartones:
+            sorteo_uno, manifiesto_uno = medir(canciones, False, cartones, directorio)
+            sorteo_matriz, manifiesto_matriz = medir(canciones, True, cartones, directorio)
+            print(f"{cartones:>9} {sorteo_uno:>9.3f} s {sorteo_matriz:>7.3f} s {sorteo_uno / sorteo_matriz:>5.1f}x "
+                  f"{manifiesto_uno:>10.3f} s {manifiesto_matriz:>7.3f} s "
+                  f"{manifiesto_uno / manifiesto_matriz:>5.1f}x", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
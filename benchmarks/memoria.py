@@ -0,0 +1,66 @@
+"""Prueba de regresión de memoria de --paginas-por-lote: genera N y 4N cartones por lotes
+(sin red, con la lista sintética `acentos` de generacion.py) y falla si el pico de memoria
+de la tirada grande supera al de la pequeña en más de un margen fijo. Con los lotes la
+memoria no debe depender del número de cartones.
+
+Uso:
+    python benchmarks/memoria.py                       # 1000 y 4000 cartones, margen 15 MB
+    python benchmarks/memoria.py --cartones 2000 --factor 5 --motor canvas
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from generacion import RAIZ, SEMILLA, escribir_lista
+
+
+def pico_memoria(directorio, canciones, cartones, args):
+    """Ejecuta bingo.py por lotes con --perfil y devuelve su pico de memoria (MB)"""
+    perfil = os.path.join(directorio, 'perfil.json')
+    comando = [sys.executable, os.path.join(RAIZ, 'bingo.py'), '-c', canciones,
+               '-n', str(cartones), '--por-pagina', str(args.por_pagina), '--motor', args.motor,
+               '--paginas-por-lote', str(args.paginas_por_lote), '--semilla', str(SEMILLA),
+               '--sin-manifiesto', '-o', os.path.join(directorio, 'salida.pdf'), '--perfil', perfil]
+    resultado = subprocess.run(comando, cwd=directorio, capture_output=True, text=True)
+    if resultado.returncode != 0 or not os.path.exists(perfil):
+        raise RuntimeError(f"Falló {' '.join(comando)}:\n{resultado.stdout[-2000:]}{resultado.stderr[-2000:]}")
+    with open(perfil, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    os.remove(perfil)
+    return datos['pico_rss_mb']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de memoria acotada de bingo.py --paginas-por-lote')
+    parser.add_argument('--cartones', type=int, default=1000, help='Cartones de la tirada pequeña (N)')
+    parser.add_argument('--factor', type=int, default=4, help='La tirada grande tiene N × factor cartones')
+    parser.add_argument('--paginas-por-lote', type=int, default=50, help='Páginas por lote')
+    parser.add_argument('--por-pagina', type=int, choices=[1, 2, 4], default=2, help='Cartones por página')
+    parser.add_argument('--motor', choices=['platypus', 'canvas'], default='platypus',
+                        help='Motor de renderizado')
+    parser.add_argument('--margen-mb', type=float, default=15,
+                        help='Crecimiento máximo permitido del pico de memoria (MB)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        canciones = escribir_lista(directorio, 'acentos')
+        picos = []
+        for cartones in (args.cartones, args.cartones * args.factor):
+            picos.append(pico_memoria(directorio, canciones, cartones, args))
+            print(f"  💾 {cartones} cartones en lotes de {args.paginas_por_lote} páginas: "
+                  f"pico de {picos[-1]:.0f} MB", flush=True)
+
+    crecimiento = picos[1] - picos[0]
+    if crecimiento > args.margen_mb:
+        print(f"❌ El pico de memoria crece {crecimiento:.1f} MB de {args.cartones} a "
+              f"{args.cartones * args.factor} cartones (> {args.margen_mb:.0f} MB)")
+        return 1
+    print(f"✅ Memoria acotada: {crecimiento:+.1f} MB al multiplicar por {args.factor} los cartones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
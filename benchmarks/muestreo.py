@@ -0,0 +1,76 @@
+"""Benchmark de --muestra-canciones con un catálogo sintético de varios millones de líneas:
+ejecuta bingo.py cargando el catálogo entero y muestreándolo por reservorio, y muestra el
+tiempo total, el de carga de canciones y el pico de memoria (tomados de --perfil). Con el
+muestreo la memoria depende del tamaño de la muestra, no del catálogo.
+
+Uso:
+    python benchmarks/muestreo.py                          # 3 millones de líneas, muestra de 500
+    python benchmarks/muestreo.py --lineas 5000000 --muestra 1000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from generacion import PALABRAS, PALABRAS_ACENTOS, RAIZ, SEMILLA
+
+
+def escribir_catalogo(ruta, lineas):
+    """Escribe (siempre igual) un catálogo de `lineas` canciones «Título - Artista»"""
+    aleatorio = random.Random(f"{SEMILLA}:catalogo")
+    palabras = PALABRAS + PALABRAS_ACENTOS
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        for numero in range(lineas):
+            titulo = ' '.join(aleatorio.choice(palabras) for _ in range(aleatorio.randint(1, 4))).title()
+            archivo.write(f"{titulo} {numero} - Artista {aleatorio.randrange(50000)}\n")
+
+
+def medir(directorio, catalogo, extra):
+    """Ejecuta bingo.py con el catálogo y devuelve (segundos, perfil)"""
+    perfil = os.path.join(directorio, 'perfil.json')
+    comando = [sys.executable, os.path.join(RAIZ, 'bingo.py'), '-c', catalogo, '-n', '10',
+               '--motor', 'canvas', '--semilla', str(SEMILLA), '--sin-manifiesto',
+               '-o', os.path.join(directorio, 'salida.pdf'), '--perfil', perfil] + extra
+    inicio = time.perf_counter()
+    resultado = subprocess.run(comando, cwd=directorio, capture_output=True, text=True)
+    tiempo = time.perf_counter() - inicio
+    if resultado.returncode != 0 or not os.path.exists(perfil):
+        raise RuntimeError(f"Falló {' '.join(comando)}:\n{resultado.stdout[-2000:]}{resultado.stderr[-2000:]}")
+    with open(perfil, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    os.remove(perfil)
+    return tiempo, datos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de --muestra-canciones de bingo.py')
+    parser.add_argument('--lineas', type=int, default=3_000_000, help='Líneas del catálogo sintético')
+    parser.add_argument('--muestra', type=int, default=500, help='Tamaño de la muestra (--muestra-canciones)')
+    parser.add_argument('--sin-carga-completa', action='store_true',
+                        help='No mide la carga del catálogo entero (la más lenta y la que más memoria usa)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        catalogo = os.path.join(directorio, 'catalogo.txt')
+        inicio = time.perf_counter()
+        escribir_catalogo(catalogo, args.lineas)
+        print(f"📝 Catálogo de {args.lineas} líneas ({os.path.getsize(catalogo) / 2**20:.0f} MiB) "
+              f"generado en {time.perf_counter() - inicio:.1f} s", flush=True)
+
+        casos = [(f"muestra de {args.muestra}", ['--muestra-canciones', str(args.muestra)])]
+        if not args.sin_carga_completa:
+            casos.append(("catálogo entero", []))
+        for nombre, extra in casos:
+            tiempo, perfil = medir(directorio, catalogo, extra)
+            print(f"  ⏱️ {nombre:<18} {tiempo:6.2f} s en total, "
+                  f"{perfil['fases_s'].get('carga_canciones', 0):6.2f} s de carga, "
+                  f"pico de {perfil['pico_rss_mb']:.0f} MB", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
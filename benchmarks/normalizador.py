@@ -0,0 +1,130 @@
+"""Micro-benchmark de la limpieza de títulos: compara la limpieza anterior (un replace por
+carácter problemático y regex sin precompilar, repetida en cada celda) con NormalizadorTexto
+(regex precompiladas y título memoizado por canción), por llamada y en las 48.000 celdas
+de una tirada de 2000 cartones. Comprueba además que ambas dan el mismo texto.
+
+Uso:
+    python benchmarks/normalizador.py
+    python benchmarks/normalizador.py --canciones 500 --cartones 10000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import timeit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import bingo  # noqa: E402
+from generacion import LISTAS, SEMILLA  # noqa: E402
+
+
+def limpiar_anterior(texto):
+    """limpiar_texto_para_pdf tal como estaba antes de NormalizadorTexto (las comillas
+    tipográficas del original habían quedado como comillas rectas)"""
+    replacements = {
+        '"': '"',
+        "'": "'",
+        '…': '...',
+        '–': '-',
+        '—': '-',
+        '´': "'",
+        '`': "'",
+        '¨': '"',
+        '°': 'º',
+        '™': '(TM)',
+        '®': '(R)',
+        '©': '(C)',
+        '€': 'EUR',
+        '£': 'GBP',
+        '¥': 'YEN',
+        '§': 'S',
+        '¶': 'P',
+        '†': '+',
+        '‡': '++',
+        '•': '*',
+        '‰': '%',
+        '‹': '<',
+        '›': '>',
+        '«': '<<',
+        '»': '>>',
+        '¡': '!',
+        '¿': '?',
+    }
+    for old, new in replacements.items():
+        texto = texto.replace(old, new)
+    texto = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', texto)
+    texto = texto.encode('ascii', 'ignore').decode('ascii')
+    if len(texto.strip()) < 3:
+        texto_original = texto
+        for old, new in replacements.items():
+            texto_original = texto_original.replace(old, new)
+        texto = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', texto_original)
+    return texto.strip()
+
+
+def titulos_sinteticos(cantidad):
+    """Títulos con acentos, símbolos y coletillas, siempre los mismos"""
+    aleatorio = random.Random(f"{SEMILLA}:normalizador")
+    _, acentos = LISTAS['acentos']
+    _, largos = LISTAS['largos']
+    simbolos = ('…', '–', '™', '«', '»', '¡', '¿', '•', '€', '\x07')
+    titulos = []
+    for i in range(cantidad):
+        titulo = (largos if i % 4 == 0 else acentos)(aleatorio)
+        if i % 3 == 0:
+            titulo += ' ' + aleatorio.choice(simbolos)
+        titulos.append(titulo)
+    return titulos
+
+
+def por_llamada(funcion, titulos, repeticiones):
+    """Mejor tiempo por llamada (µs) de funcion sobre todos los títulos"""
+    mejor = min(timeit.repeat(lambda: [funcion(t) for t in titulos], number=1, repeat=repeticiones))
+    return mejor / len(titulos) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark de NormalizadorTexto de bingo.py')
+    parser.add_argument('--canciones', type=int, default=200, help='Canciones distintas de la lista')
+    parser.add_argument('--cartones', type=int, default=2000, help='Cartones de la tirada (24 celdas cada uno)')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Repeticiones (se usa la mejor)')
+    args = parser.parse_args()
+
+    titulos = titulos_sinteticos(args.canciones)
+    normalizador = bingo.NormalizadorTexto()
+    distintos = [t for t in titulos if limpiar_anterior(t).title() != normalizador.titulo(t)]
+    if distintos:
+        print(f"❌ {len(distintos)} títulos limpian distinto, p. ej. {distintos[0]!r}")
+        return 1
+
+    anterior = por_llamada(lambda t: limpiar_anterior(t).title(), titulos, args.repeticiones)
+    nuevo = por_llamada(lambda t: normalizador.limpiar(t).title(), titulos, args.repeticiones)
+    memoizado = por_llamada(normalizador.titulo, titulos, args.repeticiones)
+    print(f"⏱️ Por llamada ({args.canciones} títulos):")
+    print(f"   limpieza anterior + title   {anterior:6.2f} µs")
+    print(f"   limpiar + title sin memoria {nuevo:6.2f} µs")
+    print(f"   titulo memoizado            {memoizado:6.2f} µs")
+
+    # Una tirada: cada celda pide el título de una de las canciones
+    aleatorio = random.Random(SEMILLA)
+    celdas = [aleatorio.choice(titulos) for _ in range(args.cartones * 24)]
+    inicio = time.perf_counter()
+    for cancion in celdas:
+        limpiar_anterior(cancion).title()
+    tiempo_anterior = time.perf_counter() - inicio
+    normalizador = bingo.NormalizadorTexto()
+    inicio = time.perf_counter()
+    for cancion in celdas:
+        normalizador.titulo(cancion)
+    tiempo_nuevo = time.perf_counter() - inicio
+    print(f"⏱️ {len(celdas)} celdas ({args.cartones} cartones): {tiempo_anterior * 1000:.0f} ms antes, "
+          f"{tiempo_nuevo * 1000:.0f} ms ahora (×{tiempo_anterior / tiempo_nuevo:.0f})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
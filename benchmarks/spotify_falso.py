@@ -0,0 +1,243 @@
+"""Prueba la descarga concurrente de playlists de SpotifyExtractor contra un servidor HTTP
+local que imita la API de Spotify (token, metadatos y páginas de pistas), sin red:
+
+- páginas que terminan en desorden: la lista sale en el orden de la playlist
+- HTTP 429 con Retry-After: se espera lo indicado y se reintenta
+- HTTP 5xx persistente: backoff y error al agotar los reintentos
+- checkpoint truncado: se retoma sin volver a pedir las páginas ya guardadas
+
+Uso:
+    python benchmarks/spotify_falso.py
+"""
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import bingo  # noqa: E402
+import spotipy  # noqa: E402
+from spotipy.oauth2 import SpotifyClientCredentials  # noqa: E402
+
+PLAYLIST = '37i9dQZF1DXcBWIGoYBM5M'
+TOTAL = 450  # 5 páginas de 100
+
+
+def pista(i):
+    return {'track': {'name': f"Canción {i}", 'artists': [{'name': f"Artista {i % 7}"}]}}
+
+
+CANCIONES = [f"Canción {i} - Artista {i % 7}" for i in range(TOTAL)]
+
+
+class ServidorFalso(ThreadingHTTPServer):
+    """API de Spotify de mentira. `fallos` da, por offset, la lista de respuestas de error
+    (estado, Retry-After) que se devuelven antes de servir la página (None = siempre falla);
+    `retrasos` da, por offset, los segundos que tarda en responder."""
+
+    daemon_threads = True
+
+    def __init__(self, fallos=None, retrasos=None):
+        super().__init__(('127.0.0.1', 0), ManejadorFalso)
+        self.fallos = {offset: (list(lista) if lista is not None else None)
+                       for offset, lista in (fallos or {}).items()}
+        self.retrasos = retrasos or {}
+        self.peticiones = []   # (offset, instante, estado) de cada petición de páginas
+        self.completadas = []  # offsets en el orden en que se sirvieron
+        self.cerrojo = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.shutdown()
+        self.server_close()
+
+
+class ManejadorFalso(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def responder(self, estado, cuerpo, cabeceras=()):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.responder(200, {'access_token': 'falso', 'token_type': 'Bearer', 'expires_in': 3600})
+
+    def do_GET(self):
+        servidor = self.server
+        ruta = urlsplit(self.path)
+        if ruta.path == '/v1/users/spotify':
+            return self.responder(200, {'id': 'spotify'})
+        if ruta.path == f'/v1/playlists/{PLAYLIST}':
+            return self.responder(200, {'name': 'Playlist falsa', 'snapshot_id': 'snap-1',
+                                        'tracks': {'total': TOTAL}})
+        # Según la versión, spotipy pide las pistas a /tracks o a /items
+        if ruta.path not in (f'/v1/playlists/{PLAYLIST}/tracks', f'/v1/playlists/{PLAYLIST}/items'):
+            return self.responder(404, {'error': {'status': 404, 'message': 'No existe'}})
+
+        consulta = parse_qs(ruta.query)
+        offset = int(consulta['offset'][0])
+        limite = int(consulta['limit'][0])
+        with servidor.cerrojo:
+            pendientes = servidor.fallos.get(offset, [])
+            if pendientes is None:
+                fallo = (503, None)
+            else:
+                fallo = pendientes.pop(0) if pendientes else None
+            servidor.peticiones.append((offset, time.monotonic(), fallo[0] if fallo else 200))
+        if fallo:
+            estado, retry_after = fallo
+            cabeceras = [('Retry-After', str(retry_after))] if retry_after is not None else []
+            return self.responder(estado, {'error': {'status': estado, 'message': 'Fallo simulado'}}, cabeceras)
+
+        time.sleep(servidor.retrasos.get(offset, 0))
+        with servidor.cerrojo:
+            servidor.completadas.append(offset)
+        self.responder(200, {'items': [pista(i) for i in range(offset, min(offset + limite, TOTAL))],
+                             'next': None})
+
+
+@contextlib.contextmanager
+def api_local(servidor):
+    """Redirige spotipy (token y API) al servidor falso"""
+    init_original = spotipy.Spotify.__init__
+    token_original = SpotifyClientCredentials.OAUTH_TOKEN_URL
+
+    def init_local(self, *args, **kwargs):
+        init_original(self, *args, **kwargs)
+        self.prefix = f"{servidor.url}/v1/"
+
+    spotipy.Spotify.__init__ = init_local
+    SpotifyClientCredentials.OAUTH_TOKEN_URL = f"{servidor.url}/api/token"
+    try:
+        yield
+    finally:
+        spotipy.Spotify.__init__ = init_original
+        SpotifyClientCredentials.OAUTH_TOKEN_URL = token_original
+
+
+def descargar(servidor, directorio, **opciones):
+    """Descarga la playlist con un SpotifyExtractor real y devuelve (canciones, extractor, salida)"""
+    salida = io.StringIO()
+    with api_local(servidor), contextlib.redirect_stdout(salida):
+        extractor = bingo.SpotifyExtractor('id', 'secreto', cache=bingo.CachePlaylists(directorio=directorio),
+                                           **opciones)
+        if extractor.sp is None:
+            raise RuntimeError(f"No se pudo conectar con el servidor falso:\n{salida.getvalue()}")
+        canciones, _ = extractor.obtener_canciones_playlist(
+            f"https://open.spotify.com/playlist/{PLAYLIST}", incluir_artista=True
+        )
+    return canciones, extractor, salida.getvalue()
+
+
+def prueba_desorden(directorio):
+    # La primera página es la más lenta: las páginas se completan al revés
+    retrasos = {offset: 0.05 * (4 - offset // 100) for offset in range(0, TOTAL, 100)}
+    with ServidorFalso(retrasos=retrasos) as servidor:
+        canciones, _, _ = descargar(servidor, directorio, descargas_paralelas=5)
+    assert servidor.completadas != sorted(servidor.completadas), \
+        f"las páginas no terminaron en desorden: {servidor.completadas}"
+    assert canciones == CANCIONES, "las canciones no siguen el orden de la playlist"
+    return f"páginas completadas en orden {servidor.completadas}, canciones en orden"
+
+
+def prueba_retry_after(directorio):
+    with ServidorFalso(fallos={100: [(429, 1)]}) as servidor:
+        canciones, extractor, _ = descargar(servidor, directorio, espera_base=0.01)
+    assert canciones == CANCIONES
+    instantes = [instante for offset, instante, _ in servidor.peticiones if offset == 100]
+    assert len(instantes) == 2, f"se esperaban 2 peticiones de la página 100, hubo {len(instantes)}"
+    espera = instantes[1] - instantes[0]
+    assert espera >= 0.95, f"se reintentó a los {espera:.2f} s sin respetar Retry-After: 1"
+    assert extractor.metricas.contadores['reintentos_api'] == 1
+    return f"429 reintentado a los {espera:.2f} s (Retry-After: 1)"
+
+
+def prueba_5xx(directorio):
+    with ServidorFalso(fallos={200: None}) as servidor:
+        try:
+            descargar(servidor, directorio, max_reintentos=3, espera_base=0.01)
+        except Exception as e:
+            error = str(e)
+        else:
+            raise AssertionError("la descarga no falló con un 503 persistente")
+    intentos = [instante for offset, instante, _ in servidor.peticiones if offset == 200]
+    assert len(intentos) == 4, f"se esperaban 1 + 3 reintentos de la página 200, hubo {len(intentos)}"
+    esperas = [b - a for a, b in zip(intentos, intentos[1:])]
+    assert esperas[-1] > esperas[0], f"sin backoff exponencial: {esperas}"
+    assert '503' in error, error
+    return f"503 abandonado tras {len(intentos)} intentos (esperas {', '.join(f'{e * 1000:.0f}' for e in esperas)} ms)"
+
+
+def prueba_checkpoint_truncado(directorio):
+    # Descarga interrumpida: cabecera, dos páginas y una tercera a medio escribir
+    ruta = os.path.join(directorio, f"{PLAYLIST}.jsonl")
+    resumen = bingo.SpotifyExtractor.resumir_items
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(json.dumps({'snapshot_id': 'snap-1', 'nombre': 'Playlist falsa', 'total': TOTAL}) + "\n")
+        for offset in (0, 300):
+            items = resumen([pista(i) for i in range(offset, offset + 100)])
+            archivo.write(json.dumps({'offset': offset, 'items': items}, ensure_ascii=False) + "\n")
+        archivo.write(json.dumps({'offset': 100, 'items': resumen([pista(100)])})[:40])
+
+    with ServidorFalso() as servidor:
+        canciones, _, _ = descargar(servidor, directorio)
+    pedidas = sorted(offset for offset, _, _ in servidor.peticiones)
+    assert pedidas == [100, 200, 400], f"se pidieron las páginas {pedidas}"
+    assert canciones == CANCIONES
+    with open(ruta, encoding='utf-8') as archivo:
+        offsets = sorted(json.loads(linea)['offset'] for linea in list(archivo)[1:])
+    assert offsets == list(range(0, TOTAL, 100)), f"checkpoint reescrito con {offsets}"
+    return f"retomado pidiendo solo las páginas {pedidas}; checkpoint completo y válido"
+
+
+PRUEBAS = [
+    ('Páginas en desorden', prueba_desorden),
+    ('429 con Retry-After', prueba_retry_after),
+    ('5xx hasta agotar reintentos', prueba_5xx),
+    ('Checkpoint truncado', prueba_checkpoint_truncado),
+]
+
+
+def main():
+    logging.getLogger('spotipy').setLevel(logging.CRITICAL)  # Los errores simulados ya se comprueban
+    fallos = 0
+    directorio_inicial = os.getcwd()
+    for nombre, prueba in PRUEBAS:
+        with tempfile.TemporaryDirectory() as directorio:
+            # spotipy guarda el token en ./.cache: que quede en el directorio temporal
+            os.chdir(directorio)
+            try:
+                detalle = prueba(directorio)
+            except Exception as e:
+                fallos += 1
+                print(f"❌ {nombre}: {type(e).__name__}: {e}")
+            else:
+                print(f"✅ {nombre}: {detalle}")
+            finally:
+                os.chdir(directorio_inicial)
+    return 1 if fallos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Comprueba que IndiceCartonesUnicos escala casi linealmente: añade 2500, 5000 y 10.000
+cartones sorteados de 500 canciones con varias distancias mínimas y falla si el tiempo
+por cartón crece demasiado al cuadruplicar la tirada (un índice cuadrático lo multiplica
+por 4) o si cada cartón se compara con demasiados cartones anteriores.
+
+Uso:
+    python benchmarks/unicidad.py
+    python benchmarks/unicidad.py --distancias 6 8 --cartones 5000 10000 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import bingo  # noqa: E402
+
+SEMILLA = 2024
+
+
+def medir(num_canciones, distancia, cartones):
+    """Añade `cartones` cartones aleatorios al índice y devuelve (segundos, comparaciones)"""
+    aleatorio = random.Random(f"{SEMILLA}:{distancia}")
+    indice = bingo.IndiceCartonesUnicos(num_canciones, distancia)
+    inicio = time.perf_counter()
+    while len(indice) < cartones:
+        indice.añadir(aleatorio.sample(range(num_canciones), 24))
+    return time.perf_counter() - inicio, indice.comparaciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del índice de cartones únicos de bingo.py')
+    parser.add_argument('--canciones', type=int, default=500, help='Canciones de la lista sintética')
+    parser.add_argument('--distancias', nargs='+', type=int, default=[1, 3, 6], help='Distancias mínimas a medir')
+    parser.add_argument('--cartones', nargs='+', type=int, default=[2500, 5000, 10000],
+                        help='Tamaños de tirada (de menor a mayor)')
+    parser.add_argument('--max-crecimiento', type=float, default=2.5,
+                        help='Máximo cociente entre el tiempo por cartón de la tirada mayor y el de la menor')
+    parser.add_argument('--max-comparaciones', type=float, default=50,
+                        help='Máximo de comparaciones por cartón en la tirada mayor')
+    args = parser.parse_args()
+
+    fallos = []
+    for distancia in args.distancias:
+        por_carton = []
+        for cartones in args.cartones:
+            segundos, comparaciones = medir(args.canciones, distancia, cartones)
+            por_carton.append(segundos / cartones)
+            print(f"  ⏱️ d={distancia} {cartones} cartones: {segundos:.2f} s, "
+                  f"{segundos / cartones * 1e6:.0f} µs/cartón, {comparaciones / cartones:.1f} comparaciones/cartón",
+                  flush=True)
+        crecimiento = por_carton[-1] / por_carton[0]
+        if crecimiento > args.max_crecimiento:
+            fallos.append(f"d={distancia}: el tiempo por cartón crece ×{crecimiento:.1f} "
+                          f"de {args.cartones[0]} a {args.cartones[-1]} cartones (> ×{args.max_crecimiento})")
+        if comparaciones / cartones > args.max_comparaciones:
+            fallos.append(f"d={distancia}: {comparaciones / cartones:.1f} comparaciones por cartón "
+                          f"con {cartones} cartones (> {args.max_comparaciones:.0f})")
+
+    for fallo in fallos:
+        print(f"❌ {fallo}")
+    if not fallos:
+        print("✅ El índice de cartones únicos escala sin crecimiento cuadrático")
+    return 1 if fallos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,44 +1,364 @@
 import random
-import pandas as pd
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch, cm
-from reportlab.pdfbase import pdfutils
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-import textwrap
 import sys
 import os
 import argparse
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 import re
-from urllib.parse import urlparse, parse_qs
-import requests
 import time
+import hashlib
+import heapq
+import math
+import io
+import codecs
+import contextlib
+import tempfile
+import threading
+import struct
+import mmap
+import json
+import csv
+import zlib
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# reportlab se importa solo en las funciones que maquetan o dibujan el PDF, para que --help
+# y los errores de argumentos respondan al momento; el centímetro es el de reportlab.lib.units
+cm = 72.0 / 2.54
+
+def directorio_cache():
+    """Directorio de caché del generador (puntos de control de descargas, etc.)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'bingo-musical-pride')
+
+class MetricasEjecucion:
+    """Tiempos por fase y contadores de una ejecución (para --perfil). Las fases que se
+    repiten o se solapan en varios hilos acumulan su duración."""
+    
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases = {}
+        self.contadores = {}
+        self.cerrojo = threading.Lock()
+    
+    @contextlib.contextmanager
+    def fase(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self.cerrojo:
+                self.fases[nombre] = self.fases.get(nombre, 0.0) + duracion
+    
+    def contar(self, nombre, cantidad=1):
+        with self.cerrojo:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+    
+    @staticmethod
+    def pico_memoria_mb():
+        """Pico de memoria residente del proceso (None si el sistema no lo ofrece)"""
+        try:
+            import resource
+        except ImportError:
+            return None
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo da en KiB y macOS en bytes
+        return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+    
+    def resumen(self, **extra):
+        """Diccionario con las fases, los contadores, los ritmos y el pico de memoria"""
+        total = time.perf_counter() - self.inicio
+        generacion = self.fases.get('generacion_pdf')
+        datos = {
+            'total_s': round(total, 4),
+            'fases_s': {nombre: round(duracion, 4) for nombre, duracion in self.fases.items()},
+            'contadores': dict(self.contadores),
+            'pico_rss_mb': self.pico_memoria_mb(),
+        }
+        if generacion:
+            for contador, ritmo in (('cartones', 'cartones_por_s'), ('paginas', 'paginas_por_s')):
+                if contador in self.contadores:
+                    datos[ritmo] = round(self.contadores[contador] / generacion, 2)
+        datos.update(extra)
+        return datos
+    
+    def guardar(self, nombre_archivo, **extra):
+        datos = self.resumen(**extra)
+        with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, ensure_ascii=False, indent=2)
+        return datos
+
+class IndicadorProgreso:
+    """Línea de progreso con ritmo y tiempo restante que se actualiza como mucho cada
+    `intervalo` segundos (reescribiéndose en el sitio si la salida es una terminal), en
+    lugar de imprimir una línea por página"""
+    
+    def __init__(self, descripcion, total, unidad="páginas", intervalo=0.5):
+        self.descripcion = descripcion
+        self.total = total
+        self.unidad = unidad
+        self.intervalo = intervalo
+        self.hechas = 0
+        self.inicio = self.ultima = time.perf_counter()
+        self.ancho_linea = 0
+    
+    @staticmethod
+    def formatear_tiempo(segundos):
+        minutos, segundos = divmod(int(segundos + 0.5), 60)
+        horas, minutos = divmod(minutos, 60)
+        return f"{horas}:{minutos:02d}:{segundos:02d}" if horas else f"{minutos}:{segundos:02d}"
+    
+    def avanzar(self, cantidad=1):
+        self.hechas += cantidad
+        ahora = time.perf_counter()
+        if ahora - self.ultima >= self.intervalo or self.hechas >= self.total:
+            self.ultima = ahora
+            self.mostrar(ahora)
+    
+    def mostrar(self, ahora):
+        transcurrido = ahora - self.inicio
+        ritmo = self.hechas / transcurrido if transcurrido > 0 else 0.0
+        restante = (self.total - self.hechas) / ritmo if ritmo else 0.0
+        linea = (f"  🌈 {self.descripcion}: {self.hechas}/{self.total} {self.unidad} "
+                 f"({100 * self.hechas / max(1, self.total):.0f}%, {ritmo:.1f} {self.unidad}/s, "
+                 f"quedan {self.formatear_tiempo(restante)})")
+        # sys.stdout se consulta en cada línea para respetar redirect_stdout
+        if sys.stdout.isatty():
+            print("\r" + linea.ljust(self.ancho_linea), end="", flush=True)
+            self.ancho_linea = len(linea)
+        else:
+            print(linea)
+    
+    def terminar(self):
+        if self.ancho_linea:
+            print()
+            self.ancho_linea = 0
+
+class CheckpointDescarga:
+    """Páginas descargadas de una playlist, una por línea (JSON Lines). Sirve para retomar una
+    descarga interrumpida y, una vez completa, como copia en caché de la playlist mientras su
+    snapshot_id no cambie. Con ruta=None las páginas solo se guardan en memoria."""
+    
+    def __init__(self, ruta, snapshot_id=None, nombre=None, total=None):
+        """Con snapshot_id=None se aprovecha lo que haya guardado sea cual sea (modo offline)"""
+        self.ruta = ruta
+        self.paginas = {}
+        self.cabecera = None
+        self.archivo = None
+        limpio = False
+        
+        if ruta is not None and os.path.exists(ruta):
+            limpio = True
+            with open(ruta, encoding='utf-8') as archivo:
+                for numero, linea in enumerate(archivo):
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        limpio = False  # Última línea a medio escribir
+                        break
+                    if numero == 0:
+                        if snapshot_id is not None and registro.get('snapshot_id') != snapshot_id:
+                            limpio = False
+                            break
+                        self.cabecera = registro
+                    else:
+                        self.paginas[registro['offset']] = registro['items']
+        
+        if self.cabecera is None:
+            self.cabecera = {'snapshot_id': snapshot_id}
+        if nombre is not None and (self.cabecera.get('nombre'), self.cabecera.get('total')) != (nombre, total):
+            self.cabecera.update(nombre=nombre, total=total)
+            limpio = False
+        # Si hay que reescribir (línea incompleta, snapshot o cabecera nuevos) se hace al guardar
+        self.reescribir = not limpio
+    
+    def guardar(self, offset, items):
+        """Añade una página completa al archivo"""
+        self.paginas[offset] = items
+        if self.ruta is None:
+            return
+        if self.archivo is None:
+            os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+            if self.reescribir:
+                self.archivo = open(self.ruta, 'w', encoding='utf-8')
+                self.archivo.write(json.dumps(self.cabecera, ensure_ascii=False) + "\n")
+                for offset_guardado, items_guardados in self.paginas.items():
+                    if offset_guardado != offset:
+                        self.archivo.write(json.dumps({'offset': offset_guardado, 'items': items_guardados},
+                                                      ensure_ascii=False) + "\n")
+            else:
+                self.archivo = open(self.ruta, 'a', encoding='utf-8')
+        self.archivo.write(json.dumps({'offset': offset, 'items': items}, ensure_ascii=False) + "\n")
+        self.archivo.flush()
+    
+    def cerrar(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+class CachePlaylists:
+    """Caché en disco de las playlists de Spotify: un CheckpointDescarga por playlist, que se
+    reutiliza mientras el snapshot_id no cambie. Las entradas caducan a los ttl_dias sin usarse
+    y, si el directorio supera max_mb, se borran primero las usadas hace más tiempo."""
+    
+    def __init__(self, directorio=None, ttl_dias=30, max_mb=100, activa=True):
+        self.directorio = directorio or os.path.join(directorio_cache(), 'playlists')
+        self.ttl = ttl_dias * 86400
+        self.max_bytes = max_mb * 1024 * 1024
+        self.activa = activa
+        self.aciertos = 0
+        self.fallos = 0
+        self.paginas_reutilizadas = 0
+        self.cerrojo = threading.Lock()  # Varias playlists se pueden descargar a la vez
+    
+    def abrir(self, playlist_id, snapshot_id=None, nombre=None, total=None):
+        """Abre las páginas guardadas de una playlist (vacías si no hay copia válida).
+        Con la caché desactivada no se lee ni se escribe nada en disco."""
+        ruta = os.path.join(self.directorio, f"{playlist_id}.jsonl") if self.activa else None
+        return CheckpointDescarga(ruta, snapshot_id, nombre, total)
+    
+    def registrar(self, checkpoint, paginas_descargadas):
+        """Cuenta el acierto o fallo, marca la entrada como usada y aplica la caducidad"""
+        with self.cerrojo:
+            self.registrar_entrada(checkpoint, paginas_descargadas)
+    
+    def registrar_entrada(self, checkpoint, paginas_descargadas):
+        if paginas_descargadas:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        self.paginas_reutilizadas += len(checkpoint.paginas) - paginas_descargadas
+        if not self.activa:
+            # Sin caché el checkpoint solo vivió en memoria: no se toca lo que haya en disco
+            return
+        if os.path.exists(checkpoint.ruta):
+            os.utime(checkpoint.ruta)
+        self.purgar()
+    
+    def purgar(self):
+        """Borra las entradas caducadas y, si hace falta, las menos usadas hasta caber en max_mb"""
+        if not os.path.isdir(self.directorio):
+            return 0
+        ahora = time.time()
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            estado = os.stat(ruta)
+            entradas.append((estado.st_mtime, estado.st_size, ruta))
+        
+        borradas = 0
+        ocupado = sum(tamaño for _, tamaño, _ in entradas)
+        for usado, tamaño, ruta in sorted(entradas):
+            if ahora - usado > self.ttl or ocupado > self.max_bytes:
+                os.remove(ruta)
+                ocupado -= tamaño
+                borradas += 1
+        return borradas
+
+class CachePaginas:
+    """Caché en disco del contenido ya dibujado de cada página del PDF (su content stream
+    y los recursos que nombra), con la huella de lo que contiene como clave. Un archivo
+    comprimido por página; si el directorio supera max_mb, se borran primero las páginas
+    usadas hace más tiempo."""
+
+    def __init__(self, directorio=None, max_mb=500):
+        self.directorio = directorio or os.path.join(directorio_cache(), 'paginas')
+        self.max_bytes = max_mb * 1024 * 1024
+        self.aciertos = 0
+        self.fallos = 0
+
+    def ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pagina")
+
+    def leer(self, clave):
+        """Devuelve la página guardada con esa clave (y la marca como usada) o None"""
+        ruta = self.ruta(clave)
+        try:
+            with open(ruta, 'rb') as archivo:
+                entrada = json.loads(zlib.decompress(archivo.read()))
+            os.utime(ruta)
+        except (OSError, ValueError, zlib.error):
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return entrada
+
+    def guardar(self, clave, entrada):
+        """Guarda una página de forma atómica (una ejecución cortada no deja entradas a medias)"""
+        os.makedirs(self.directorio, exist_ok=True)
+        datos = zlib.compress(json.dumps(entrada, separators=(',', ':')).encode('utf-8'))
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(datos)
+        os.replace(temporal, self.ruta(clave))
+
+    def purgar(self):
+        """Borra las páginas menos usadas hasta que el directorio quepa en max_mb"""
+        if not os.path.isdir(self.directorio):
+            return 0
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            estado = os.stat(os.path.join(self.directorio, nombre))
+            entradas.append((estado.st_mtime, estado.st_size, nombre))
+
+        borradas = 0
+        ocupado = sum(tamaño for _, tamaño, _ in entradas)
+        for _, tamaño, nombre in sorted(entradas):
+            if ocupado <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directorio, nombre))
+            ocupado -= tamaño
+            borradas += 1
+        return borradas
 
 class SpotifyExtractor:
     """Clase para extraer canciones de playlists de Spotify"""
     
-    def __init__(self, client_id=None, client_secret=None):
+    TAMAÑO_PAGINA = 100  # Máximo por request de Spotify
+    ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+    CAMPOS_PISTAS = 'items(track(name,artists(name))),next'
+    
+    def __init__(self, client_id=None, client_secret=None, descargas_paralelas=4, max_reintentos=6,
+                 espera_base=0.5, espera_maxima=60, cache=None, offline=False, metricas=None):
         self.client_id = client_id
         self.client_secret = client_secret
+        self.descargas_paralelas = max(1, descargas_paralelas)
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.cache = cache or CachePlaylists()
+        self.offline = offline
+        self.metricas = metricas or MetricasEjecucion()
+        self.pausa_hasta = 0.0
+        self.aleatorio = random.Random()  # Jitter sin tocar el generador global de los cartones
         self.sp = None
         
-        if client_id and client_secret:
+        if client_id and client_secret and not offline:
             self.configurar_spotify_api()
     
     def configurar_spotify_api(self):
         """Configura la conexión con la API de Spotify"""
+        try:
+            import spotipy
+            import requests
+            from spotipy.oauth2 import SpotifyClientCredentials
+        except ImportError:
+            raise ImportError("Para usar playlists de Spotify instala spotipy: pip install spotipy requests")
+        
         try:
             client_credentials_manager = SpotifyClientCredentials(
                 client_id=self.client_id,
                 client_secret=self.client_secret
             )
-            self.sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
+            # Sesión HTTP compartida por los hilos de descarga y sin los reintentos internos
+            # de spotipy: los gestiona llamar_api (Retry-After y backoff exponencial)
+            sesion = requests.Session()
+            adaptador = requests.adapters.HTTPAdapter(pool_maxsize=self.descargas_paralelas, max_retries=0)
+            sesion.mount('https://', adaptador)
+            sesion.mount('http://', adaptador)
+            self.sp = spotipy.Spotify(
+                client_credentials_manager=client_credentials_manager,
+                requests_session=sesion
+            )
             
             # Test de conexión
             self.sp.user('spotify')
@@ -50,11 +370,12 @@ class SpotifyExtractor:
             return False
     
     def extraer_playlist_id(self, url):
-        """Extrae el ID de la playlist desde una URL de Spotify"""
+        """Extrae el ID de la playlist desde una URL de Spotify (o lo devuelve si ya es un ID)"""
         patterns = [
             r'spotify:playlist:([a-zA-Z0-9]+)',
             r'open\.spotify\.com/playlist/([a-zA-Z0-9]+)',
-            r'spotify\.com/playlist/([a-zA-Z0-9]+)'
+            r'spotify\.com/playlist/([a-zA-Z0-9]+)',
+            r'^\s*([a-zA-Z0-9]{22})\s*$'
         ]
         
         for pattern in patterns:
@@ -64,69 +385,149 @@ class SpotifyExtractor:
         
         raise ValueError(f"No se pudo extraer el ID de la playlist de la URL: {url}")
     
+    def espera_reintento(self, intento):
+        """Backoff exponencial con jitter para el reintento número intento (desde 0)"""
+        return min(self.espera_maxima, self.espera_base * 2 ** intento) * self.aleatorio.uniform(0.5, 1.0)
+    
+    def llamar_api(self, funcion, *args, **kwargs):
+        """Llama a la API reintentando los errores transitorios: respeta Retry-After en los 429
+        (pausando a todos los hilos) y usa backoff exponencial en el resto"""
+        import requests
+        from spotipy.exceptions import SpotifyException
+        
+        for intento in range(self.max_reintentos + 1):
+            pausa = self.pausa_hasta - time.monotonic()
+            if pausa > 0:
+                time.sleep(pausa)
+            self.metricas.contar('llamadas_api')
+            try:
+                return funcion(*args, **kwargs)
+            except SpotifyException as e:
+                if e.http_status not in self.ESTADOS_REINTENTABLES or intento == self.max_reintentos:
+                    raise
+                espera = self.espera_reintento(intento)
+                retry_after = (e.headers or {}).get('Retry-After')
+                if retry_after:
+                    try:
+                        espera = min(self.espera_maxima, float(retry_after))
+                    except ValueError:
+                        pass
+                if e.http_status == 429:
+                    self.pausa_hasta = max(self.pausa_hasta, time.monotonic() + espera)
+                motivo = f"HTTP {e.http_status}"
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if intento == self.max_reintentos:
+                    raise
+                espera = self.espera_reintento(intento)
+                motivo = type(e).__name__
+            self.metricas.contar('reintentos_api')
+            print(f"   ⏳ {motivo}: reintento {intento + 1}/{self.max_reintentos} en {espera:.1f} s")
+            time.sleep(espera)
+    
+    @staticmethod
+    def resumir_items(items):
+        """Reduce los items de una página a [nombre, [artistas]] (None si no hay pista)"""
+        resumen = []
+        for item in items:
+            track = item.get('track')
+            if not track or not track.get('name'):
+                resumen.append(None)
+            else:
+                resumen.append([track['name'], [artist['name'] for artist in track.get('artists', [])]])
+        return resumen
+    
+    def descargar_pagina(self, playlist_id, offset):
+        """Descarga una página de pistas de la playlist"""
+        results = self.llamar_api(
+            self.sp.playlist_tracks,
+            playlist_id,
+            offset=offset,
+            limit=self.TAMAÑO_PAGINA,
+            fields=self.CAMPOS_PISTAS
+        )
+        return self.resumir_items(results['items'])
+    
     def obtener_canciones_playlist(self, playlist_url, incluir_artista=True, max_canciones=None):
-        """Obtiene todas las canciones de una playlist de Spotify"""
-        if not self.sp:
+        """Obtiene todas las canciones de una playlist de Spotify. Primero se piden solo los
+        metadatos: si el snapshot_id coincide con la copia en caché no se descarga nada más.
+        Si no, las páginas que faltan se piden en paralelo y cada una se guarda al completarse,
+        así que una descarga interrumpida se retoma donde se quedó."""
+        if not self.sp and not self.offline:
             raise Exception("Spotify API no configurada. Proporciona client_id y client_secret.")
         
         try:
             playlist_id = self.extraer_playlist_id(playlist_url)
             print(f"🎵 Extrayendo canciones de la playlist ID: {playlist_id}")
             
-            # Obtener información de la playlist
-            playlist_info = self.sp.playlist(playlist_id)
-            nombre_playlist = playlist_info['name']
-            total_tracks = playlist_info['tracks']['total']
+            if self.offline:
+                checkpoint = self.cache.abrir(playlist_id)
+                if 'total' not in checkpoint.cabecera:
+                    raise Exception(f"La playlist {playlist_id} no está en la caché (--offline)")
+                nombre_playlist = checkpoint.cabecera['nombre']
+                total_tracks = checkpoint.cabecera['total']
+            else:
+                # Solo metadatos: nombre, snapshot y total de pistas
+                playlist_info = self.llamar_api(self.sp.playlist, playlist_id, fields='name,snapshot_id,tracks(total)')
+                nombre_playlist = playlist_info['name']
+                total_tracks = playlist_info['tracks']['total']
+                checkpoint = self.cache.abrir(playlist_id, playlist_info.get('snapshot_id'),
+                                              nombre_playlist, total_tracks)
             
             print(f"📋 Playlist: '{nombre_playlist}'")
             print(f"🔢 Total de canciones en la playlist: {total_tracks}")
+            if checkpoint.paginas:
+                print(f"♻️ {len(checkpoint.paginas)} páginas ya guardadas en caché")
             
-            canciones = []
-            offset = 0
-            limit = 100  # Máximo por request de Spotify
-            
-            while True:
-                # Obtener batch de canciones
-                results = self.sp.playlist_tracks(
-                    playlist_id,
-                    offset=offset,
-                    limit=limit,
-                    fields='items(track(name,artists(name),explicit)),next'
-                )
-                
-                tracks = results['items']
-                if not tracks:
-                    break
-                
-                for item in tracks:
-                    track = item.get('track')
-                    if not track or not track.get('name'):
-                        continue
-                    
-                    nombre_cancion = track['name']
-                    artistas = [artist['name'] for artist in track.get('artists', [])]
-                    
-                    if incluir_artista and artistas:
-                        cancion_completa = f"{nombre_cancion} - {', '.join(artistas)}"
-                    else:
-                        cancion_completa = nombre_cancion
+            # Con límite solo se piden las páginas necesarias (y más si hay pistas vacías)
+            limite = total_tracks if not max_canciones else min(total_tracks, max_canciones)
+            descargadas = 0
+            try:
+                while True:
+                    pendientes = [offset for offset in range(0, limite, self.TAMAÑO_PAGINA)
+                                  if offset not in checkpoint.paginas]
+                    if pendientes and self.offline:
+                        raise Exception(f"La copia en caché de la playlist {playlist_id} está incompleta (--offline)")
+                    if pendientes:
+                        with ThreadPoolExecutor(max_workers=self.descargas_paralelas) as executor:
+                            futuros = {executor.submit(self.descargar_pagina, playlist_id, offset): offset
+                                       for offset in pendientes}
+                            try:
+                                for futuro in as_completed(futuros):
+                                    checkpoint.guardar(futuros[futuro], futuro.result())
+                                    descargadas += 1
+                            except BaseException:
+                                for futuro in futuros:
+                                    futuro.cancel()
+                                raise
                     
-                    canciones.append(cancion_completa)
+                    canciones = []
+                    for offset in sorted(checkpoint.paginas):
+                        if offset >= limite:
+                            break
+                        for pista in checkpoint.paginas[offset]:
+                            if pista is None:
+                                continue
+                            nombre_cancion, artistas = pista
+                            if incluir_artista and artistas:
+                                canciones.append(f"{nombre_cancion} - {', '.join(artistas)}")
+                            else:
+                                canciones.append(nombre_cancion)
                     
-                    # Aplicar límite si se especifica
-                    if max_canciones and len(canciones) >= max_canciones:
+                    if not max_canciones or len(canciones) >= max_canciones or limite >= total_tracks:
                         break
-                
-                if max_canciones and len(canciones) >= max_canciones:
-                    break
-                
-                if not results['next']:
-                    break
-                
-                offset += limit
-                time.sleep(0.1)  # Rate limiting cortés
+                    limite = min(total_tracks, limite + max_canciones - len(canciones))
+            finally:
+                checkpoint.cerrar()
             
-            print(f"✅ Se extrajeron {len(canciones)} canciones de la playlist")
+            self.cache.registrar(checkpoint, descargadas)
+            if max_canciones:
+                canciones = canciones[:max_canciones]
+            
+            if descargadas:
+                print(f"✅ Se extrajeron {len(canciones)} canciones de la playlist "
+                      f"({descargadas} páginas descargadas en paralelo con {self.descargas_paralelas} hilos)")
+            else:
+                print(f"✅ Se extrajeron {len(canciones)} canciones de la playlist (desde la caché)")
             
             if len(canciones) < 24:
                 print(f"⚠️ Advertencia: Solo se encontraron {len(canciones)} canciones.")
@@ -158,39 +559,487 @@ class SpotifyExtractor:
         except Exception as e:
             raise Exception(f"Error en método alternativo: {e}")
 
+class MedidorTexto:
+    """Mide y parte texto con el mismo criterio que Paragraph, memoizando los resultados de
+    pdfmetrics.stringWidth en una tabla por fuente (palabra y tamaño -> ancho)"""
+    
+    # Paso y tamaño mínimo al reducir la fuente de una celda
+    PASO_AJUSTE = 0.5
+    TAMAÑO_MINIMO = 4
+    
+    def __init__(self):
+        self.tablas_anchos = {}
+    
+    def ancho(self, texto, fuente, tamaño):
+        """Ancho de un texto en puntos (stringWidth memoizado)"""
+        tabla = self.tablas_anchos.get(fuente)
+        if tabla is None:
+            tabla = self.tablas_anchos[fuente] = {}
+        ancho = tabla.get((texto, tamaño))
+        if ancho is None:
+            from reportlab.pdfbase import pdfmetrics
+            ancho = tabla[(texto, tamaño)] = pdfmetrics.stringWidth(texto, fuente, tamaño)
+        return ancho
+    
+    def partir_lineas(self, texto, fuente, tamaño, ancho_maximo):
+        """Parte el texto en líneas con el mismo criterio que Paragraph (incluido el
+        margen de encogimiento de espacios de rl_config.spaceShrinkage)"""
+        from reportlab import rl_config
+        ancho_espacio = self.ancho(' ', fuente, tamaño)
+        encogimiento = rl_config.spaceShrinkage * ancho_espacio
+        lineas = []
+        linea = []
+        ancho = -ancho_espacio
+        for palabra in texto.split():
+            ancho_palabra = self.ancho(palabra, fuente, tamaño)
+            nuevo_ancho = ancho + ancho_espacio + ancho_palabra
+            if linea and nuevo_ancho > ancho_maximo + encogimiento * len(linea):
+                lineas.append(' '.join(linea))
+                linea = [palabra]
+                ancho = ancho_palabra
+            else:
+                linea.append(palabra)
+                ancho = nuevo_ancho
+        if linea:
+            lineas.append(' '.join(linea))
+        return lineas
+    
+    def tamaño_ajustado(self, texto, fuente, tamaño_maximo, ancho_maximo, alto_maximo):
+        """Mayor tamaño de celda (índice a tamaño, título a tamaño - 1, interlineado tamaño + 1)
+        con el que ninguna palabra se sale de ancho y el párrafo cabe en alto"""
+        palabras = texto.split()
+        tamaño = tamaño_maximo
+        while tamaño > self.TAMAÑO_MINIMO:
+            lineas = self.partir_lineas(texto, fuente, tamaño - 1, ancho_maximo)
+            cabe_alto = (len(lineas) + 1) * (tamaño + 1) + 2 <= alto_maximo
+            if cabe_alto and all(self.ancho(p, fuente, tamaño - 1) <= ancho_maximo for p in palabras):
+                return tamaño
+            tamaño -= self.PASO_AJUSTE
+        return self.TAMAÑO_MINIMO
+
+class ResolutorFuentes:
+    """Encuentra y registra las fuentes TrueType de los cartones. Recorre una sola vez los
+    directorios de fuentes habituales, guarda en la caché en disco la ruta de cada archivo
+    y registra cada fuente una sola vez por proceso (analizar un TTF cuesta ~12 ms)."""
+    
+    # Familias en orden de preferencia: nombre y (fuente, archivo) normal y negrita
+    FAMILIAS = (
+        ('DejaVu', ('DejaVu-Sans', 'DejaVuSans.ttf'), ('DejaVu-Sans-Bold', 'DejaVuSans-Bold.ttf')),
+        ('Arial', ('Arial-Unicode', 'arial.ttf'), ('Arial-Unicode', 'arial.ttf')),
+        ('Calibri', ('Calibri', 'calibri.ttf'), ('Calibri-Bold', 'calibrib.ttf')),
+    )
+    # Los archivos no encontrados se vuelven a buscar pasado este tiempo
+    TTL_NO_ENCONTRADAS = 24 * 3600
+    
+    familia = None  # (normal, negrita, nombre de la familia) ya registrada en este proceso
+    
+    def __init__(self, ruta_cache=None):
+        self.ruta_cache = ruta_cache or os.path.join(directorio_cache(), 'fuentes.json')
+        self.rutas = self.leer_cache()
+        self.cache_modificada = False
+        self.indice = None
+    
+    @classmethod
+    def registrar_familia(cls):
+        """Devuelve la familia registrada en el proceso, resolviéndola la primera vez"""
+        if cls.familia is None:
+            cls.familia = cls().registrar()
+        return cls.familia
+    
+    @staticmethod
+    def directorios_locales():
+        """Directorios donde se puede dejar un TTF a mano (tienen prioridad sobre la caché)"""
+        return [os.getcwd(), os.path.dirname(os.path.abspath(__file__))]
+    
+    @staticmethod
+    def directorios_sistema():
+        """Directorios de fuentes habituales de Linux, macOS y Windows, y los de reportlab"""
+        from reportlab import rl_config
+        casa = os.path.expanduser('~')
+        datos = os.environ.get('XDG_DATA_HOME') or os.path.join(casa, '.local', 'share')
+        return [
+            os.path.join(casa, '.fonts'),
+            os.path.join(datos, 'fonts'),
+            '/usr/local/share/fonts',
+            '/usr/share/fonts',
+            os.path.join(casa, 'Library', 'Fonts'),
+            '/Library/Fonts',
+            os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts'),
+        ] + list(rl_config.TTFSearchPath)
+    
+    def leer_cache(self):
+        try:
+            with open(self.ruta_cache, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return {}
+    
+    def guardar_cache(self):
+        """Guarda las rutas resueltas (si no se puede escribir, simplemente no hay caché)"""
+        if not self.cache_modificada:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.ruta_cache), exist_ok=True)
+            temporal = f"{self.ruta_cache}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                json.dump(self.rutas, archivo, ensure_ascii=False, indent=1)
+            os.replace(temporal, self.ruta_cache)
+        except OSError:
+            pass
+    
+    def indexar(self):
+        """Recorre una vez los directorios del sistema: nombre de archivo en minúsculas -> ruta"""
+        indice = {}
+        for raiz in self.directorios_sistema():
+            for directorio, _, archivos in os.walk(raiz):
+                for nombre in archivos:
+                    if nombre.lower().endswith('.ttf'):
+                        indice.setdefault(nombre.lower(), os.path.join(directorio, nombre))
+        return indice
+    
+    def resolver(self, archivo):
+        """Ruta de un archivo de fuente (sin distinguir mayúsculas), o None si no está"""
+        for directorio in self.directorios_locales():
+            ruta = os.path.join(directorio, archivo)
+            if os.path.isfile(ruta):
+                return ruta
+        
+        clave = archivo.lower()
+        entrada = self.rutas.get(clave)
+        if entrada:
+            if entrada['ruta'] and os.path.isfile(entrada['ruta']):
+                return entrada['ruta']
+            if not entrada['ruta'] and time.time() - entrada['fecha'] < self.TTL_NO_ENCONTRADAS:
+                return None
+        
+        if self.indice is None:
+            self.indice = self.indexar()
+        ruta = self.indice.get(clave)
+        self.rutas[clave] = {'ruta': ruta, 'fecha': time.time()}
+        self.cache_modificada = True
+        return ruta
+    
+    def registrar(self):
+        """Registra la primera familia disponible y devuelve (normal, negrita, familia);
+        sin ninguna, las fuentes base de PDF (que no hay que incrustar)"""
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.pdfbase import pdfmetrics
+        try:
+            for familia, *caras in self.FAMILIAS:
+                rutas = [self.resolver(archivo) for _, archivo in caras]
+                if not all(rutas):
+                    continue
+                try:
+                    for (fuente, _), ruta in zip(caras, rutas):
+                        if fuente not in pdfmetrics.getRegisteredFontNames():
+                            pdfmetrics.registerFont(TTFont(fuente, ruta))
+                except Exception:
+                    continue  # TTF dañado o no soportado: probar la siguiente familia
+                return caras[0][0], caras[1][0], familia
+            return 'Helvetica', 'Helvetica-Bold', None
+        finally:
+            self.guardar_cache()
+
+class NormalizadorTexto:
+    """Limpia los títulos para el PDF con una tabla de traducción y una expresión regular
+    precompiladas, y memoiza el título limpio y capitalizado de cada canción"""
+    
+    # Caracteres problemáticos comunes y su sustituto ASCII
+    TABLA_REEMPLAZOS = {
+        '…': '...',
+        '–': '-',
+        '—': '-',
+        '´': "'",
+        '`': "'",
+        '¨': '"',
+        '°': 'º',
+        '™': '(TM)',
+        '®': '(R)',
+        '©': '(C)',
+        '€': 'EUR',
+        '£': 'GBP',
+        '¥': 'YEN',
+        '§': 'S',
+        '¶': 'P',
+        '†': '+',
+        '‡': '++',
+        '•': '*',
+        '‰': '%',
+        '‹': '<',
+        '›': '>',
+        '«': '<<',
+        '»': '>>',
+        '¡': '!',
+        '¿': '?',
+    }
+    # Una sola pasada con una clase de caracteres compilada (str.translate con una tabla
+    # de cadenas es varias veces más lento con títulos que no son latin-1)
+    REEMPLAZABLES = re.compile('[' + re.escape(''.join(TABLA_REEMPLAZOS)) + ']')
+    
+    # Caracteres de control y no imprimibles
+    CARACTERES_CONTROL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+    
+    def __init__(self):
+        self.titulos = {}
+    
+    def limpiar(self, texto):
+        """Sustituye los caracteres problemáticos, quita los de control y deja solo ASCII"""
+        texto = self.REEMPLAZABLES.sub(lambda m: self.TABLA_REEMPLAZOS[m.group()], texto)
+        if not texto.isascii():
+            texto = texto.encode('ascii', 'ignore').decode('ascii')
+        return self.CARACTERES_CONTROL.sub('', texto).strip()
+    
+    def titulo(self, cancion):
+        """Título limpio y capitalizado de una canción, calculado una sola vez por canción"""
+        titulo = self.titulos.get(cancion)
+        if titulo is None:
+            titulo = self.titulos[cancion] = self.limpiar(cancion).title()
+        return titulo
+
+class MuestreoReservorio:
+    """Muestra aleatoria uniforme de tamaño fijo sobre un flujo de longitud desconocida,
+    con memoria proporcional a la muestra y no al flujo (algoritmo L de Li: en lugar de
+    sortear cada elemento, sortea cuántos hay que saltarse hasta el siguiente reemplazo)"""
+    
+    def __init__(self, tamaño, aleatorio=None):
+        if tamaño < 1:
+            raise ValueError("El tamaño de la muestra debe ser al menos 1")
+        self.tamaño = tamaño
+        self.aleatorio = aleatorio or random.Random()
+        self.muestra = []
+        self.vistos = 0
+        self.peso = 1.0
+        self.siguiente = None  # posición en el flujo del próximo elemento que entra
+    
+    def sortear_siguiente(self):
+        """Avanza el peso y sortea la posición del próximo reemplazo"""
+        # 1 - random() está en (0, 1], así que el logaritmo siempre está definido
+        self.peso *= math.exp(math.log(1.0 - self.aleatorio.random()) / self.tamaño)
+        salto = math.log(1.0 - self.aleatorio.random()) / math.log1p(-self.peso)
+        self.siguiente += math.floor(salto) + 1
+    
+    def añadir(self, elementos):
+        """Pasa los elementos por el reservorio (se puede llamar varias veces seguidas)"""
+        for elemento in elementos:
+            if self.vistos < self.tamaño:
+                self.muestra.append(elemento)
+                if self.vistos + 1 == self.tamaño:
+                    self.siguiente = self.vistos
+                    self.sortear_siguiente()
+            elif self.vistos == self.siguiente:
+                self.muestra[self.aleatorio.randrange(self.tamaño)] = elemento
+                self.sortear_siguiente()
+            self.vistos += 1
+        return self
+
 class GeneradorBingoMusicalPride:
+    # Paleta de fondos de celda (el manifiesto guarda la posición en esta tupla)
+    PALETA_CELDAS = ('rojo', 'naranja', 'amarillo', 'verde', 'azul', 'morado', 'rosa', 'celeste')
+    
+    # Fila y columna de cada una de las 24 casillas (por filas, sin la casilla libre), y
+    # peso de cada fila o columna para comparar usos: la central tiene 4 casillas y las
+    # demás 5, así que 4 usos en una de 5 casillas equivalen a 5 en la central (4*5 == 5*4)
+    CASILLAS = tuple((fila, col) for fila in range(5) for col in range(5) if (fila, col) != (2, 2))
+    PESOS_LINEA = (4, 4, 5, 4, 4)
+    
+    # Con --matriz-cartones los cartones se sortean con NumPy por bloques, cada uno con su
+    # propia semilla: cualquier cartón se regenera sorteando solo su bloque
+    CARTONES_POR_BLOQUE = 4096
+    # Por debajo de este número de canciones se ordenan claves aleatorias por fila; por
+    # encima es más barato sortear 24 posiciones y repetir las filas con alguna repetida
+    CANCIONES_SORTEO_POR_CLAVES = 200
+    
+    # Todo lo que se puede escribir en una página: los títulos se limpian a ASCII y el
+    # resto son los textos fijos del cartón. Con --cache-paginas se asignan de antemano
+    # los códigos de estos caracteres en cada fuente para que no dependan del documento.
+    TEXTO_CODIFICACION = ''.join(map(chr, range(32, 127))) + "CARTÓN 🎵 LIBRE 🏳️‍🌈 BINGO POLARI 🏳️‍⚧️"
+    VERSION_CACHE_PAGINAS = 2
+    # Estados gráficos (transparencias) que usa un content stream: «/gRLs0 gs»
+    ESTADO_GRAFICO = re.compile(r'/(\S+) gs\b')
+    
     def __init__(self, ruta_canciones=None, playlist_url=None, spotify_client_id=None, 
                  spotify_client_secret=None, tamaño_fuente=7, cartones_por_pagina=2,
-                 incluir_artista=True, max_canciones_spotify=None):
+                 incluir_artista=True, max_canciones_spotify=None, canciones=None, nombre_fuente=None,
+                 semilla=None, ajustar_texto=False, descargas_paralelas=4, cache_playlists=None,
+                 offline=False, muestra_canciones=None, matriz_cartones=False):
         
         self.tamaño_fuente = tamaño_fuente
+        self.ajustar_texto = ajustar_texto
+        self.tamaños_cancion = None
+        self.medidas_ajuste = None
+        self.medidor = MedidorTexto()
+        self.semilla = semilla
+        self.cartones_fijados = {}
+        self.candidatos_rechazados = 0
+        self.distancia_minima = None  # Distancia exigida entre cartones (None = sin unicidad)
+        self.equilibrado = False
+        self.matriz_cartones = matriz_cartones
+        self.bloques_matriz = {}
+        self.tabla_marco = None
         self.cartones_por_pagina = cartones_por_pagina
         self.colores_pride = self.obtener_colores_pride()
+        self.normalizador = NormalizadorTexto()
         self.emojis_pride = ['🏳️‍🌈', '🏳️‍⚧️', '💖', '🌈', '✨', '🎵', '🎶', '💃', '🕺', '🔥', '💫', '⭐']
         self.configurar_fuentes()
+        self.crear_estilos()
+        
+        # Párrafos ya maquetados, compartidos por todos los cartones
+        self.cache_parrafos = {}
+        self.aciertos_cache_parrafos = 0
+        self.fallos_cache_parrafos = 0
+        
+        # Tiempos por fase y contadores de la ejecución (se guardan con --perfil)
+        self.metricas = MetricasEjecucion()
         
         # Configurar extractor de Spotify
-        self.spotify_extractor = SpotifyExtractor(spotify_client_id, spotify_client_secret)
+        self.spotify_extractor = SpotifyExtractor(spotify_client_id, spotify_client_secret,
+                                                  descargas_paralelas=descargas_paralelas,
+                                                  cache=cache_playlists, offline=offline,
+                                                  metricas=self.metricas)
         
-        # Cargar canciones desde archivo o Spotify
-        if playlist_url:
-            self.canciones, self.nombre_fuente = self.cargar_canciones_spotify(
-                playlist_url, incluir_artista, max_canciones_spotify
-            )
-        elif ruta_canciones:
-            self.canciones = self.cargar_canciones_archivo(ruta_canciones)
-            self.nombre_fuente = os.path.basename(ruta_canciones)
+        # Cargar canciones desde archivos o Spotify (o usar una lista ya cargada)
+        self.resumen_fuentes = []
+        self.canciones_duplicadas = 0
+        self.muestra_canciones = muestra_canciones
+        self.canciones_catalogo = None
+        fuentes = [('spotify', url) for url in self.como_lista(playlist_url)]
+        fuentes += [('archivo', ruta) for ruta in self.como_lista(ruta_canciones)]
+        fuentes = self.fuentes_distintas(fuentes)
+        if canciones is not None:
+            self.canciones = list(canciones)
+            self.nombre_fuente = nombre_fuente or "lista de canciones"
+        elif fuentes and muestra_canciones:
+            # La muestra sale de la semilla de la tirada, así que también es reproducible
+            self.asegurar_semilla()
+            with self.metricas.fase('carga_canciones'):
+                self.canciones, self.nombre_fuente = self.muestrear_fuentes(
+                    fuentes, incluir_artista, max_canciones_spotify
+                )
+        elif fuentes:
+            with self.metricas.fase('carga_canciones'):
+                self.canciones, self.nombre_fuente = self.cargar_fuentes(
+                    fuentes, incluir_artista, max_canciones_spotify
+                )
         else:
             raise ValueError("Debes proporcionar una URL de playlist de Spotify o un archivo de canciones")
         
+        self.huella_canciones = self.calcular_huella_canciones()
         self.verificar_canciones()
     
+    @staticmethod
+    def como_lista(valor):
+        """Admite una fuente suelta o una lista de fuentes"""
+        if not valor:
+            return []
+        return [valor] if isinstance(valor, str) else list(valor)
+    
+    def fuentes_distintas(self, fuentes):
+        """Quita las fuentes repetidas (la misma playlist como URL, URI o ID, o el mismo archivo
+        por rutas distintas): se cargan a la vez y compartirían el checkpoint de la caché"""
+        distintas = []
+        vistas = set()
+        for tipo, origen in fuentes:
+            if tipo == 'spotify':
+                try:
+                    clave = (tipo, self.spotify_extractor.extraer_playlist_id(origen))
+                except ValueError:
+                    clave = (tipo, origen)  # El error se mostrará al cargarla
+            else:
+                clave = (tipo, os.path.normcase(os.path.realpath(origen)))
+            if clave in vistas:
+                print(f"🔁 Fuente repetida, se carga una sola vez: {origen}")
+                continue
+            vistas.add(clave)
+            distintas.append((tipo, origen))
+        return distintas
+    
+    def clave_cancion(self, cancion):
+        """Clave para detectar duplicados: título y artista principal, limpios y sin mayúsculas"""
+        titulo, _, artistas = cancion.rpartition(' - ')
+        if not titulo:
+            titulo, artistas = artistas, ''
+        artista_principal = artistas.split(',')[0]
+        return (' '.join(self.normalizador.limpiar(titulo).casefold().split()),
+                ' '.join(self.normalizador.limpiar(artista_principal).casefold().split()))
+    
+    def cargar_fuente(self, fuente, incluir_artista=True, max_canciones=None):
+        """Carga una fuente ('spotify', url) o ('archivo', ruta) y devuelve (canciones, nombre)"""
+        tipo, origen = fuente
+        if tipo == 'spotify':
+            return self.cargar_canciones_spotify(origen, incluir_artista, max_canciones)
+        return self.cargar_canciones_archivo(origen), os.path.basename(origen)
+    
+    def cargar_fuentes(self, fuentes, incluir_artista=True, max_canciones=None):
+        """Carga todas las fuentes a la vez y las combina en orden, descartando las canciones
+        repetidas (mismo título y artista principal)"""
+        if len(fuentes) == 1:
+            return self.cargar_fuente(fuentes[0], incluir_artista, max_canciones)
+        
+        with ThreadPoolExecutor(max_workers=len(fuentes)) as executor:
+            resultados = list(executor.map(
+                lambda fuente: self.cargar_fuente(fuente, incluir_artista, max_canciones), fuentes
+            ))
+        
+        canciones = []
+        vistas = set()
+        for canciones_fuente, nombre in resultados:
+            añadidas = 0
+            for cancion in canciones_fuente:
+                clave = self.clave_cancion(cancion)
+                if clave in vistas:
+                    continue
+                vistas.add(clave)
+                canciones.append(cancion)
+                añadidas += 1
+            self.resumen_fuentes.append((nombre, len(canciones_fuente), añadidas))
+        self.canciones_duplicadas = sum(cargadas - añadidas for _, cargadas, añadidas in self.resumen_fuentes)
+        
+        print(f"🔀 {len(fuentes)} fuentes combinadas: {len(canciones)} canciones, "
+              f"{self.canciones_duplicadas} duplicados descartados")
+        return canciones, " + ".join(nombre for nombre, _, _ in self.resumen_fuentes)
+    
+    def muestrear_fuentes(self, fuentes, incluir_artista=True, max_canciones=None):
+        """Recorre las fuentes en orden y en flujo, sin cargar los archivos enteros, y se queda
+        con una muestra uniforme de `muestra_canciones` canciones (sin duplicados entre fuentes)"""
+        reservorio = MuestreoReservorio(self.muestra_canciones,
+                                        random.Random(f"{self.semilla}:muestra"))
+        vistas = set()
+        
+        for tipo, origen in fuentes:
+            if tipo == 'spotify':
+                canciones, nombre = self.cargar_canciones_spotify(origen, incluir_artista, max_canciones)
+            else:
+                canciones, nombre = self.flujo_canciones_archivo(origen), os.path.basename(origen)
+            
+            cargadas = 0
+            if len(fuentes) > 1:
+                def sin_duplicados(canciones):
+                    nonlocal cargadas
+                    for cancion in canciones:
+                        cargadas += 1
+                        clave = self.clave_cancion(cancion)
+                        if clave not in vistas:
+                            vistas.add(clave)
+                            yield cancion
+                canciones = sin_duplicados(canciones)
+            
+            antes = reservorio.vistos
+            reservorio.añadir(canciones)
+            añadidas = reservorio.vistos - antes
+            self.resumen_fuentes.append((nombre, cargadas or añadidas, añadidas))
+        
+        self.canciones_duplicadas = sum(cargadas - añadidas for _, cargadas, añadidas in self.resumen_fuentes)
+        self.canciones_catalogo = reservorio.vistos
+        print(f"🎲 Muestra aleatoria: {len(reservorio.muestra)} de {reservorio.vistos} canciones")
+        return reservorio.muestra, " + ".join(nombre for nombre, _, _ in self.resumen_fuentes)
+    
     def cargar_canciones_spotify(self, playlist_url, incluir_artista=True, max_canciones=None):
         """Carga canciones desde una playlist de Spotify"""
         try:
-            canciones, nombre_playlist = self.spotify_extractor.obtener_canciones_playlist(
-                playlist_url, incluir_artista, max_canciones
-            )
+            with self.metricas.fase('descarga_spotify'):
+                canciones, nombre_playlist = self.spotify_extractor.obtener_canciones_playlist(
+                    playlist_url, incluir_artista, max_canciones
+                )
             
             if not canciones:
                 # Intentar método alternativo
@@ -202,10 +1051,11 @@ class GeneradorBingoMusicalPride:
             
             # Limpiar y procesar canciones
             canciones_limpias = []
-            for cancion in canciones:
-                cancion_limpia = self.limpiar_texto_para_pdf(cancion)
-                if cancion_limpia and len(cancion_limpia) > 2:
-                    canciones_limpias.append(cancion_limpia)
+            with self.metricas.fase('limpieza_texto'):
+                for cancion in canciones:
+                    cancion_limpia = self.limpiar_texto_para_pdf(cancion)
+                    if cancion_limpia and len(cancion_limpia) > 2:
+                        canciones_limpias.append(cancion_limpia)
             
             return canciones_limpias, nombre_playlist
             
@@ -214,74 +1064,82 @@ class GeneradorBingoMusicalPride:
             print("💡 Verifica la URL de la playlist y las credenciales de API")
             raise
     
+    # Marcas de orden de bytes (BOM) reconocidas al principio del archivo
+    MARCAS_CODIFICACION = (
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'),
+    )
+    TAMAÑO_BLOQUE_DECODIFICACION = 1 << 20
+    
+    @classmethod
+    def detectar_codificacion(cls, bloques):
+        """Detecta la codificación de un archivo a partir de sus bloques de bytes: primero
+        por su BOM y, si no tiene, validando UTF-8 con un decodificador incremental (sin crear
+        una copia decodificada del archivo entero). Si no es UTF-8 válido se usa latin-1,
+        que acepta cualquier secuencia de bytes."""
+        decodificador = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for numero, bloque in enumerate(bloques):
+                if numero == 0:
+                    for marca, codificacion in cls.MARCAS_CODIFICACION:
+                        if bloque.startswith(marca):
+                            return codificacion
+                decodificador.decode(bloque)
+            decodificador.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return 'latin-1'
+        return 'utf-8'
+    
+    @staticmethod
+    def leer_lineas(flujo, codificacion):
+        """Recorre perezosamente las líneas no vacías de un flujo binario"""
+        with io.TextIOWrapper(flujo, encoding=codificacion) as texto:
+            for linea in texto:
+                linea = linea.strip()
+                if linea:
+                    yield linea
+    
     def cargar_canciones_archivo(self, ruta):
-        """Carga las canciones desde el archivo de texto con encoding UTF-8"""
+        """Carga las canciones desde el archivo de texto, leyéndolo en flujo (en memoria solo
+        quedan las líneas ya decodificadas, no además el archivo entero en bytes)"""
         try:
-            # Intentar diferentes encodings
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    with open(ruta, 'r', encoding=encoding) as f:
-                        canciones = [line.strip() for line in f if line.strip()]
-                    
-                    # Verificar que se cargaron correctamente probando caracteres especiales
-                    test_text = ''.join(canciones)
-                    if any(char in test_text for char in 'áéíóúñÁÉÍÓÚÑ'):
-                        print(f"✅ Archivo cargado con encoding: {encoding}")
-                    else:
-                        print(f"✅ Archivo cargado con encoding: {encoding} (sin caracteres especiales detectados)")
-                    
-                    return canciones
-                except UnicodeDecodeError:
-                    continue
-            
-            # Si ningún encoding funciona, cargar con errors='replace'
-            with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
-                canciones = [line.strip() for line in f if line.strip()]
-            print("⚠️ Archivo cargado con reemplazo de caracteres problemáticos")
+            canciones = list(self.flujo_canciones_archivo(ruta))
+            print(f"✅ {len(canciones)} canciones cargadas de {os.path.basename(ruta)}")
             return canciones
             
         except FileNotFoundError:
-            raise FileNotFoundError(f"No se pudo encontrar el archivo: {ruta}")
+            raise
         except Exception as e:
             raise Exception(f"Error al cargar canciones: {e}")
     
+    def flujo_canciones_archivo(self, ruta):
+        """Recorre las canciones del archivo sin cargarlo entero en memoria (para muestrear
+        catálogos enormes): una pasada por bloques detecta la codificación y otra lo lee"""
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"No se pudo encontrar el archivo: {ruta}")
+        f = open(ruta, 'rb')
+        paso = self.TAMAÑO_BLOQUE_DECODIFICACION
+        codificacion = self.detectar_codificacion(iter(lambda: f.read(paso), b''))
+        f.seek(0)
+        print(f"📖 Recorriendo {os.path.basename(ruta)} en flujo (encoding: {codificacion})")
+        return self.leer_lineas(f, codificacion)
+    
     def configurar_fuentes(self):
-        """Configura fuentes que soporten caracteres especiales"""
-        try:
-            # Intentar registrar fuentes con soporte UTF-8
-            pdfmetrics.registerFont(TTFont('DejaVu-Sans', 'DejaVuSans.ttf'))
-            pdfmetrics.registerFont(TTFont('DejaVu-Sans-Bold', 'DejaVuSans-Bold.ttf'))
-            self.fuente_normal = 'DejaVu-Sans'
-            self.fuente_bold = 'DejaVu-Sans-Bold'
-            print("✅ Fuentes DejaVu cargadas correctamente")
-        except:
-            try:
-                # Fuentes alternativas más comunes
-                pdfmetrics.registerFont(TTFont('Arial-Unicode', 'arial.ttf'))
-                self.fuente_normal = 'Arial-Unicode'
-                self.fuente_bold = 'Arial-Unicode'
-                print("✅ Fuente Arial cargada correctamente")
-            except:
-                try:
-                    # Intentar con fuentes del sistema Windows
-                    pdfmetrics.registerFont(TTFont('Calibri', 'calibri.ttf'))
-                    pdfmetrics.registerFont(TTFont('Calibri-Bold', 'calibrib.ttf'))
-                    self.fuente_normal = 'Calibri'
-                    self.fuente_bold = 'Calibri-Bold'
-                    print("✅ Fuente Calibri cargada correctamente")
-                except:
-                    # Usar fuentes por defecto de reportlab
-                    self.fuente_normal = 'Helvetica'
-                    self.fuente_bold = 'Helvetica-Bold'
-                    print("⚠️ Usando fuentes por defecto (Helvetica)")
-                    print("💡 Para mejor soporte de caracteres especiales, instala:")
-                    print("   - DejaVu Sans (recomendado)")
-                    print("   - O copia arial.ttf al directorio del script")
+        """Configura fuentes que soporten caracteres especiales (se buscan y registran una
+        sola vez por proceso, aunque se creen varios generadores)"""
+        self.fuente_normal, self.fuente_bold, familia = ResolutorFuentes.registrar_familia()
+        if familia:
+            print(f"✅ Fuentes {familia} cargadas correctamente")
+        else:
+            print("⚠️ Usando fuentes por defecto (Helvetica)")
+            print("💡 Para mejor soporte de caracteres especiales, instala:")
+            print("   - DejaVu Sans (recomendado)")
+            print("   - O copia arial.ttf al directorio del script")
     
     def obtener_colores_pride(self):
         """Define los colores del arcoíris para usar en el diseño"""
+        from reportlab.lib import colors
         return {
             'rojo': colors.Color(0.91, 0.26, 0.21),      # #E8443A
             'naranja': colors.Color(1.0, 0.65, 0.0),     # #FFA500
@@ -297,96 +1155,139 @@ class GeneradorBingoMusicalPride:
     
     def limpiar_texto_para_pdf(self, texto):
         """Limpia el texto para evitar problemas con caracteres especiales en PDF"""
-        import re
-        
-        # Reemplazar caracteres problemáticos comunes
-        replacements = {
-            '"': '"',
-            '"': '"',
-            ''': "'",
-            ''': "'",
-            '…': '...',
-            '–': '-',
-            '—': '-',
-            '´': "'",
-            '`': "'",
-            '¨': '"',
-            '°': 'º',
-            '™': '(TM)',
-            '®': '(R)',
-            '©': '(C)',
-            '€': 'EUR',
-            '£': 'GBP',
-            '¥': 'YEN',
-            '§': 'S',
-            '¶': 'P',
-            '†': '+',
-            '‡': '++',
-            '•': '*',
-            '‰': '%',
-            '‹': '<',
-            '›': '>',
-            '«': '<<',
-            '»': '>>',
-            '¡': '!',
-            '¿': '?',
-        }
-        
-        # Aplicar reemplazos
-        for old, new in replacements.items():
-            texto = texto.replace(old, new)
-        
-        # Remover caracteres de control y caracteres no imprimibles
-        texto = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', texto)
-        
-        # Convertir caracteres no-ASCII problemáticos a ASCII equivalentes
-        texto = texto.encode('ascii', 'ignore').decode('ascii')
-        
-        # Si el texto queda muy corto o vacío después de la limpieza, usar versión más permisiva
-        if len(texto.strip()) < 3:
-            # Intentar con limpieza menos agresiva
-            texto_original = texto
-            for old, new in replacements.items():
-                texto_original = texto_original.replace(old, new)
-            # Solo remover caracteres de control, mantener acentos
-            texto = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', texto_original)
-        
-        return texto.strip()
+        return self.normalizador.limpiar(texto)
     
-    def formatear_texto_cancion(self, indice, cancion):
+    def formatear_texto_cancion(self, indice, cancion, tamaño=None):
         """Formatea el texto de la canción con índice en negrita y mejor presentación"""
-        cancion_limpia = self.limpiar_texto_para_pdf(cancion)
+        tamaño = tamaño or self.tamaño_fuente
         
         # Crear el HTML para formateo avanzado
         indice_html = f"<b>#{indice:03d}</b>"
         
-        # Formatear el nombre de la canción
-        # Capitalizar correctamente y mejorar la presentación
-        cancion_formateada = cancion_limpia.title()
+        # Formatear el nombre de la canción (limpio y capitalizado una sola vez por canción)
+        cancion_formateada = self.normalizador.titulo(cancion)
         
         # Crear párrafo con HTML formatting
-        texto_html = f"{indice_html}<br/><font size='{self.tamaño_fuente-1}'>{cancion_formateada}</font>"
+        texto_html = f"{indice_html}<br/><font size='{tamaño-1}'>{cancion_formateada}</font>"
         
         return texto_html
     
-    def crear_parrafo_cancion(self, indice, cancion):
-        """Crea un párrafo con formato mejorado para la canción"""
-        # Estilo personalizado para las canciones
-        estilo_cancion = ParagraphStyle(
-            'CancionStyle',
-            fontName=self.fuente_normal,
-            fontSize=self.tamaño_fuente,
-            textColor=colors.black,
+    def crear_estilos(self):
+        """Crea una sola vez los estilos de párrafo que comparten todas las celdas y encabezados"""
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER
+        # Estilo personalizado para las canciones (uno por tamaño si se ajusta el texto)
+        self.estilos_cancion = {}
+        self.estilo_cancion = self.obtener_estilo_cancion(self.tamaño_fuente)
+        
+        # Estilo especial para la casilla libre
+        self.estilo_libre = ParagraphStyle(
+            'LibreStyle',
+            fontName=self.fuente_bold,
+            fontSize=self.tamaño_fuente + 1,
+            textColor=self.colores_pride['morado'],
             alignment=TA_CENTER,
-            leading=self.tamaño_fuente + 1,
-            leftIndent=2,
-            rightIndent=2,
-            spaceBefore=1,
-            spaceAfter=1
+            leading=self.tamaño_fuente + 2
         )
         
-        texto_html = self.formatear_texto_cancion(indice, cancion)
-        return Paragraph(texto_html, estilo_cancion)
+        # Encabezado de cada cartón: título muy compacto y número de cartón pequeño
+        estilos = getSampleStyleSheet()
+        self.estilo_titulo = ParagraphStyle(
+            'TituloCompacto',
+            parent=estilos['Normal'],
+            fontSize=12,
+            textColor=self.colores_pride['morado'],
+            alignment=TA_CENTER,
+            spaceAfter=0.02*cm,
+            fontName=self.fuente_bold
+        )
+        self.estilo_numero = ParagraphStyle(
+            'NumeroCompacto',
+            parent=estilos['Normal'],
+            fontSize=9,
+            textColor=self.colores_pride['rosa'],
+            alignment=TA_CENTER,
+            spaceAfter=0.02*cm,
+            fontName=self.fuente_bold
+        )
+    
+    def obtener_estilo_cancion(self, tamaño):
+        """Estilo de las celdas de canción para un tamaño de fuente (creado una sola vez)"""
+        estilo = self.estilos_cancion.get(tamaño)
+        if estilo is None:
+            from reportlab.lib.styles import ParagraphStyle
+            from reportlab.lib import colors
+            from reportlab.lib.enums import TA_CENTER
+            estilo = self.estilos_cancion[tamaño] = ParagraphStyle(
+                'CancionStyle',
+                fontName=self.fuente_normal,
+                fontSize=tamaño,
+                textColor=colors.black,
+                alignment=TA_CENTER,
+                leading=tamaño + 1,
+                leftIndent=2,
+                rightIndent=2,
+                spaceBefore=1,
+                spaceAfter=1
+            )
+        return estilo
+    
+    def obtener_parrafo(self, clave, texto_html, estilo):
+        """Devuelve el párrafo cacheado para la clave o lo crea (y lo maqueta una sola vez)"""
+        parrafo = self.cache_parrafos.get(clave)
+        if parrafo is None:
+            from elementos_pdf import ParrafoCacheado
+            self.fallos_cache_parrafos += 1
+            parrafo = self.cache_parrafos[clave] = ParrafoCacheado(texto_html, estilo)
+        else:
+            self.aciertos_cache_parrafos += 1
+        return parrafo
+    
+    def crear_parrafo_cancion(self, indice, cancion):
+        """Crea un párrafo con formato mejorado para la canción (uno por canción distinta)"""
+        tamaño = self.tamaño_cancion(indice)
+        clave = (indice, self.fuente_normal, tamaño, self.ancho_celda())
+        return self.obtener_parrafo(clave, self.formatear_texto_cancion(indice, cancion, tamaño),
+                                    self.obtener_estilo_cancion(tamaño))
+    
+    def crear_parrafo_libre(self):
+        """Crea el párrafo de la casilla libre (compartido por todos los cartones)"""
+        clave = ('LIBRE', self.fuente_bold, self.tamaño_fuente, self.ancho_celda())
+        return self.obtener_parrafo(clave, "<b>🎵 LIBRE 🎵</b>", self.estilo_libre)
+    
+    def preparar_tamaños_canciones(self, ancho_texto, alto_texto):
+        """Con ajuste de texto, calcula una sola vez por canción el mayor tamaño de fuente
+        (hasta tamaño_fuente) con el que su texto cabe en la celda"""
+        if not self.ajustar_texto or self.medidas_ajuste == (ancho_texto, alto_texto):
+            return
+        self.medidas_ajuste = (ancho_texto, alto_texto)
+        self.tamaños_cancion = [
+            self.medidor.tamaño_ajustado(self.normalizador.titulo(cancion), self.fuente_normal,
+                                         self.tamaño_fuente, ancho_texto, alto_texto)
+            for cancion in self.canciones
+        ]
+        reducidas = [t for t in self.tamaños_cancion if t < self.tamaño_fuente]
+        if reducidas:
+            print(f"  🔤 Texto ajustado: {len(reducidas)} canciones con fuente reducida (mínimo {min(reducidas)} pt)")
+    
+    def preparar_tamaños_tabla(self):
+        """Prepara los tamaños ajustados para las celdas de la tabla de platypus"""
+        # Padding de celda (4+4 horizontal, 6+6 vertical) e indentación (2+2)
+        self.preparar_tamaños_canciones(self.ancho_celda() - 12, self.alto_celda() - 12)
+    
+    def tamaño_cancion(self, indice):
+        """Tamaño de fuente de la celda de una canción (índice desde 1)"""
+        if self.tamaños_cancion is None:
+            return self.tamaño_fuente
+        return self.tamaños_cancion[indice - 1]
+    
+    def ancho_celda(self):
+        """Ancho de columna de la tabla del cartón según cartones por página"""
+        return 3.6 * cm if self.cartones_por_pagina == 2 else 3.2 * cm
+    
+    def alto_celda(self):
+        """Alto de fila de la tabla del cartón según cartones por página"""
+        return 2.0 * cm if self.cartones_por_pagina == 2 else 1.8 * cm
     
     def verificar_canciones(self):
         """Verifica que hay suficientes canciones para generar cartones únicos"""
@@ -408,16 +1309,209 @@ class GeneradorBingoMusicalPride:
         from math import comb
         return min(1000, comb(len(self.canciones), 24) // 1000)
     
+    def calcular_huella_canciones(self):
+        """Calcula una huella corta de la lista de canciones (cambia si cambia cualquier canción o su orden)"""
+        return hashlib.sha256("\n".join(self.canciones).encode('utf-8')).hexdigest()[:16]
+    
+    def aleatorio_carton(self, numero_carton, uso="canciones"):
+        """Devuelve el generador aleatorio de un cartón. Con semilla depende solo de
+        (semilla, huella de canciones, número de cartón), así que cualquier cartón se
+        puede regenerar por separado; sin semilla se usa el generador global."""
+        if self.semilla is None:
+            return random
+        return random.Random(f"{self.semilla}:{self.huella_canciones}:{numero_carton}:{uso}")
+    
+    def sortear_indices_carton(self, numero_carton, intento=0):
+        """Sortea las posiciones (desde 0) de las 24 canciones de un cartón"""
+        if self.matriz_cartones and intento == 0:
+            bloque, fila = divmod(numero_carton - 1, self.CARTONES_POR_BLOQUE)
+            return self.bloque_matriz(bloque)[0][fila].tolist()
+        uso = "canciones" if intento == 0 else f"canciones-{intento}"
+        return self.aleatorio_carton(numero_carton, uso).sample(range(len(self.canciones)), 24)
+    
+    def bloque_matriz(self, bloque):
+        """Devuelve (sorteándolo la primera vez) un bloque de la matriz de cartones: las
+        posiciones de canción (uint16) y los colores (uint8) de CARTONES_POR_BLOQUE cartones,
+        una fila de 24 por cartón. Con semilla, el bloque depende solo de (semilla, huella
+        de canciones, número de bloque), como los cartones sorteados uno a uno."""
+        matrices = self.bloques_matriz.get(bloque)
+        if matrices is None:
+            try:
+                import numpy as np
+            except ImportError:
+                raise ImportError("--matriz-cartones necesita numpy: pip install numpy")
+            if self.semilla is None:
+                rng = np.random.default_rng()
+            else:
+                rng = np.random.default_rng([self.semilla % 2**64, int(self.huella_canciones, 16), bloque])
+            matrices = self.bloques_matriz[bloque] = (
+                self.sortear_matriz_canciones(np, rng, self.CARTONES_POR_BLOQUE, len(self.canciones)),
+                rng.integers(0, len(self.PALETA_CELDAS), (self.CARTONES_POR_BLOQUE, 24), dtype=np.uint8),
+            )
+        return matrices
+    
+    @classmethod
+    def sortear_matriz_canciones(cls, np, rng, num_cartones, num_canciones):
+        """Sortea de una vez las 24 posiciones de canción distintas de num_cartones cartones"""
+        tipo = np.uint16 if num_canciones <= 2**16 else np.uint32
+        if num_canciones < cls.CANCIONES_SORTEO_POR_CLAVES:
+            # Las 24 canciones con las claves más bajas de cada fila, en orden de clave
+            claves = rng.random((num_cartones, num_canciones))
+            return np.argsort(claves, axis=1)[:, :24].astype(tipo)
+        
+        # 24 posiciones al azar por fila; las filas con alguna repetida se vuelven a sortear
+        # (condicionar a que no haya repetidas deja una muestra uniforme sin reemplazo)
+        matriz = rng.integers(0, num_canciones, (num_cartones, 24))
+        pendientes = np.arange(num_cartones)
+        while pendientes.size:
+            ordenadas = np.sort(matriz[pendientes], axis=1)
+            pendientes = pendientes[(ordenadas[:, 1:] == ordenadas[:, :-1]).any(axis=1)]
+            matriz[pendientes] = rng.integers(0, num_canciones, (pendientes.size, 24))
+        return matriz.astype(tipo)
+    
+    def indices_carton(self, numero_carton):
+        """Posiciones (desde 0) de las 24 canciones de un cartón, fijadas o sorteadas"""
+        indices = self.cartones_fijados.get(numero_carton)
+        if indices is None:
+            indices = self.sortear_indices_carton(numero_carton)
+        return indices
+    
+    def seleccionar_canciones_carton(self, numero_carton):
+        """Selecciona las 24 canciones (con su índice) que van en un cartón"""
+        return [(i + 1, self.canciones[i]) for i in self.indices_carton(numero_carton)]
+    
+    def sortear_colores_carton(self, numero_carton):
+        """Sortea el color de fondo de las 24 casillas (posición en PALETA_CELDAS)"""
+        if self.matriz_cartones:
+            bloque, fila = divmod(numero_carton - 1, self.CARTONES_POR_BLOQUE)
+            return self.bloque_matriz(bloque)[1][fila].tolist()
+        aleatorio = self.aleatorio_carton(numero_carton, "colores")
+        return [aleatorio.randrange(len(self.PALETA_CELDAS)) for _ in range(24)]
+    
+    def asegurar_semilla(self):
+        """Fija una semilla aleatoria si no se indicó, para que la tirada sea reproducible"""
+        if self.semilla is None:
+            self.semilla = random.randrange(2**63)
+            print(f"🎲 Semilla de la tirada: {self.semilla} (usa --semilla para reproducirla)")
+        return self.semilla
+    
+    def preparar_cartones_unicos(self, num_cartones, distancia_minima=1, max_intentos=1000,
+                                 primero=1, anteriores=()):
+        """Sortea de antemano los cartones primero..primero+num_cartones-1 garantizando que no
+        se repiten y que cada par difiere en al menos distancia_minima canciones. Los cartones
+        de `anteriores` (por ejemplo, un manifiesto ya impreso) entran antes en el índice, así
+        que los nuevos tampoco repiten ninguno de ellos."""
+        indice = IndiceCartonesUnicos(len(self.canciones), distancia_minima)
+        for indices in anteriores:
+            indice.añadir(indices, comprobar=False)
+        self.cartones_fijados = {}
+        for numero in range(primero, primero + num_cartones):
+            for intento in range(max_intentos):
+                indices = self.sortear_indices_carton(numero, intento)
+                if indice.añadir(indices):
+                    self.cartones_fijados[numero] = indices
+                    break
+            else:
+                raise ValueError(
+                    f"No se pudo generar el cartón #{numero:03d} distinto de los anteriores "
+                    f"(distancia mínima {distancia_minima}) tras {max_intentos} intentos. "
+                    f"Usa más canciones, menos cartones o una distancia menor."
+                )
+        
+        self.candidatos_rechazados = indice.rechazados
+        self.distancia_minima = distancia_minima
+        print(f"🧮 {num_cartones} cartones únicos (distancia mínima {distancia_minima}), "
+              f"{indice.rechazados} candidatos rechazados")
+        return indice
+    
+    def preparar_cartones_equilibrados(self, num_cartones, por_posicion=False, distancia_minima=None,
+                                       max_intentos=1000):
+        """Sortea de antemano los cartones 1..num_cartones repartiendo las canciones por igual:
+        cada cartón lleva las 24 canciones que menos han salido hasta entonces (un montículo
+        ordenado por apariciones, con desempate aleatorio), así que al final dos canciones
+        cualesquiera salen en un número de cartones que difiere como mucho en uno.
+        
+        Con por_posicion, además cada canción se coloca en la casilla libre de cuya fila y
+        columna menos ha salido. Con distancia_minima, los cartones tampoco se repiten (como
+        en preparar_cartones_unicos); si un cartón choca, se elige entre algunas candidatas más.
+        Cada cartón depende de los anteriores, así que para regenerar el cartón k hay que
+        preparar los k primeros con la misma semilla."""
+        num_canciones = len(self.canciones)
+        aleatorio = self.aleatorio_carton(0, "equilibrado")
+        monticulo = [(0, aleatorio.random(), indice) for indice in range(num_canciones)]
+        heapq.heapify(monticulo)
+        indice_unicos = IndiceCartonesUnicos(num_canciones, distancia_minima) if distancia_minima else None
+        if por_posicion:
+            usos_filas = [[0] * 5 for _ in range(num_canciones)]
+            usos_columnas = [[0] * 5 for _ in range(num_canciones)]
+        
+        self.cartones_fijados = {}
+        for numero in range(1, num_cartones + 1):
+            for intento in range(max_intentos):
+                candidatas = [heapq.heappop(monticulo)
+                              for _ in range(min(24 + intento, num_canciones))]
+                elegidas = candidatas if len(candidatas) == 24 else aleatorio.sample(candidatas, 24)
+                indices = [indice for _, _, indice in elegidas]
+                if por_posicion:
+                    indices = self.colocar_en_casillas(indices, usos_filas, usos_columnas, aleatorio)
+                else:
+                    aleatorio.shuffle(indices)
+                
+                if indice_unicos is None or indice_unicos.añadir(indices):
+                    break
+                for candidata in candidatas:
+                    heapq.heappush(monticulo, candidata)
+            else:
+                raise ValueError(
+                    f"No se pudo generar el cartón equilibrado #{numero:03d} distinto de los anteriores "
+                    f"(distancia mínima {distancia_minima}) tras {max_intentos} intentos. "
+                    f"Usa más canciones, menos cartones o una distancia menor."
+                )
+            
+            self.cartones_fijados[numero] = indices
+            elegidas = set(indices)
+            for apariciones, desempate, indice in candidatas:
+                if indice in elegidas:
+                    heapq.heappush(monticulo, (apariciones + 1, aleatorio.random(), indice))
+                else:
+                    heapq.heappush(monticulo, (apariciones, desempate, indice))
+        
+        apariciones = [entrada[0] for entrada in monticulo]
+        if indice_unicos is not None:
+            self.candidatos_rechazados = indice_unicos.rechazados
+        self.distancia_minima = distancia_minima
+        self.equilibrado = True
+        print(f"⚖️ {num_cartones} cartones equilibrados{' por fila y columna' if por_posicion else ''}: "
+              f"cada canción sale en {min(apariciones)}-{max(apariciones)} cartones")
+        return apariciones
+    
+    def colocar_en_casillas(self, indices, usos_filas, usos_columnas, aleatorio):
+        """Coloca las 24 canciones de un cartón, una tras otra, cada una en la casilla
+        libre de cuya fila y columna menos ha salido (ponderando por las casillas de la línea)"""
+        # Las canciones ya llegan del montículo en orden aleatorio; los empates entre
+        # casillas se deshacen empezando a recorrerlas por una casilla al azar
+        inicio = aleatorio.randrange(24)
+        libres = list(range(inicio, 24)) + list(range(inicio))
+        colocados = [None] * 24
+        casillas, pesos = self.CASILLAS, self.PESOS_LINEA
+        for indice in indices:
+            # Los usos se guardan ya multiplicados por el peso de su fila o columna
+            filas, columnas = usos_filas[indice], usos_columnas[indice]
+            puntos = [filas[fila] + columnas[col] for fila, col in casillas]
+            casilla = min(libres, key=puntos.__getitem__)
+            libres.remove(casilla)
+            colocados[casilla] = indice
+            fila, col = casillas[casilla]
+            filas[fila] += pesos[fila]
+            columnas[col] += pesos[col]
+        return colocados
+    
     def generar_carton(self, numero_carton):
         """Genera un cartón individual de 5x5 con espacio libre en el centro"""
         if len(self.canciones) < 24:
             raise ValueError("Necesitas al menos 24 canciones diferentes")
         
-        # Crear lista de tuplas con índice y canción
-        canciones_con_indice = [(i + 1, cancion) for i, cancion in enumerate(self.canciones)]
-        
-        # Seleccionar 24 canciones aleatorias con sus índices
-        canciones_seleccionadas = random.sample(canciones_con_indice, 24)
+        canciones_seleccionadas = self.seleccionar_canciones_carton(numero_carton)
         
         # Crear matriz 5x5 con espacio libre en el centro
         carton = []
@@ -427,16 +1521,8 @@ class GeneradorBingoMusicalPride:
             fila_carton = []
             for col in range(5):
                 if fila == 2 and col == 2:  # Centro del cartón
-                    # Crear párrafo especial para la casilla libre
-                    estilo_libre = ParagraphStyle(
-                        'LibreStyle',
-                        fontName=self.fuente_bold,
-                        fontSize=self.tamaño_fuente + 1,
-                        textColor=self.colores_pride['morado'],
-                        alignment=TA_CENTER,
-                        leading=self.tamaño_fuente + 2
-                    )
-                    fila_carton.append(Paragraph("<b>🎵 LIBRE 🎵</b>", estilo_libre))
+                    # Párrafo especial para la casilla libre
+                    fila_carton.append(self.crear_parrafo_libre())
                 else:
                     # Obtener índice y canción
                     indice, cancion = canciones_seleccionadas[contador]
@@ -447,30 +1533,45 @@ class GeneradorBingoMusicalPride:
         
         return carton
     
-    def obtener_color_aleatorio_pride(self):
+    def obtener_color_aleatorio_pride(self, aleatorio=random):
         """Obtiene un color aleatorio de la paleta Pride"""
-        colores = ['rojo', 'naranja', 'amarillo', 'verde', 'azul', 'morado', 'rosa', 'celeste']
-        color_nombre = random.choice(colores)
+        color_nombre = aleatorio.choice(self.PALETA_CELDAS)
         return self.colores_pride[color_nombre]
     
-    def crear_tabla_carton(self, carton, numero_carton):
-        """Crea una tabla formateada para el PDF con tema Pride (optimizada para 2 por página)"""
+    def crear_tabla_carton(self, carton, numero_carton, parte=None):
+        """Crea una tabla formateada para el PDF con tema Pride (optimizada para 2 por página).
+        Con parte='celdas' deja fuera la rejilla y la casilla libre; con parte='marco' dibuja
+        solo esas dos (la parte común a todos los cartones, ver crear_tabla_marco)."""
+        from reportlab.platypus import Table, TableStyle
+        from reportlab.lib import colors
         # Ajustar tamaño de columnas según cartones por página
-        col_width = 3.6 * cm if self.cartones_por_pagina == 2 else 3.2 * cm
-        row_height = 2.0 * cm if self.cartones_por_pagina == 2 else 1.8 * cm
+        col_width = self.ancho_celda()
+        row_height = self.alto_celda()
+        con_celdas = parte != 'marco'
+        con_marco = parte != 'celdas'
+        if not con_marco:
+            carton = [list(fila) for fila in carton]
+            carton[2][2] = ''
         
         tabla = Table(carton, colWidths=[col_width]*5, rowHeights=[row_height]*5)
         
         # Colores para cada celda (efecto arcoíris sutil)
+        colores_celdas = iter(self.sortear_colores_carton(numero_carton)) if con_celdas else None
         colores_fondo = []
         for fila in range(5):
             for col in range(5):
                 if fila == 2 and col == 2:  # Casilla libre
-                    colores_fondo.append(('BACKGROUND', (col, fila), (col, fila), 
-                                        colors.Color(1.0, 0.84, 0.0, alpha=0.4)))  # Dorado más visible
-                else:
+                    if con_celdas:
+                        colores_fondo.append(('BACKGROUND', (col, fila), (col, fila), 
+                                            colors.Color(1.0, 0.84, 0.0, alpha=0.4)))  # Dorado más visible
+                    elif con_marco:
+                        # El marco va en un Form XObject, que no lleva sus propios ExtGState:
+                        # el dorado al 40% se precompone sobre blanco (opaco)
+                        colores_fondo.append(('BACKGROUND', (col, fila), (col, fila),
+                                              colors.Color(1.0, 0.4 * 0.84 + 0.6, 0.6)))
+                elif con_celdas:
                     # Colores alternos suaves del arcoíris
-                    color_base = self.obtener_color_aleatorio_pride()
+                    color_base = self.colores_pride[self.PALETA_CELDAS[next(colores_celdas)]]
                     color_suave = colors.Color(color_base.red, color_base.green, color_base.blue, alpha=0.2)
                     colores_fondo.append(('BACKGROUND', (col, fila), (col, fila), color_suave))
         
@@ -479,7 +1580,8 @@ class GeneradorBingoMusicalPride:
             # Bordes con colores del arcoíris
             ('GRID', (0, 0), (-1, -1), 1.5, self.colores_pride['morado']),
             ('LINEWIDTH', (0, 0), (-1, -1), 1.5),
-            
+        ] if con_marco else []
+        estilo_base += [
             # Alineación
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
@@ -497,58 +1599,62 @@ class GeneradorBingoMusicalPride:
         tabla.setStyle(TableStyle(estilo_completo))
         return tabla
     
+    def crear_tabla_marco(self):
+        """Tabla con la rejilla y la casilla libre de los cartones (las demás celdas, vacías y
+        sin fondo). Es igual para todos, así que se crea una sola vez."""
+        if self.tabla_marco is None:
+            celdas = [[''] * 5 for _ in range(5)]
+            celdas[2][2] = self.crear_parrafo_libre()
+            self.tabla_marco = self.crear_tabla_carton(celdas, None, parte='marco')
+        return self.tabla_marco
+    
     def crear_encabezado_pride_compacto(self, numero_carton):
-        """Crea un encabezado muy compacto para 2 cartones por página"""
-        estilos = getSampleStyleSheet()
-        
-        # Título muy compacto
-        estilo_titulo = ParagraphStyle(
-            'TituloCompacto',
-            parent=estilos['Normal'],
-            fontSize=12,
-            textColor=self.colores_pride['morado'],
-            alignment=TA_CENTER,
-            spaceAfter=0.02*cm,
-            fontName=self.fuente_bold
-        )
-        
-        # Número de cartón pequeño
-        estilo_numero = ParagraphStyle(
-            'NumeroCompacto',
-            parent=estilos['Normal'],
-            fontSize=9,
-            textColor=self.colores_pride['rosa'],
-            alignment=TA_CENTER,
-            spaceAfter=0.02*cm,
-            fontName=self.fuente_bold
-        )
-        
-        titulo = Paragraph("🏳️‍🌈 BINGO POLARI 🏳️‍⚧️", estilo_titulo)
-        numero = Paragraph(f"<b>CARTÓN #{numero_carton:03d}</b>", estilo_numero)
+        """Crea un encabezado muy compacto para 2 cartones por página (el título, igual en
+        todos los cartones, es un solo párrafo compartido)"""
+        from reportlab.platypus import Paragraph
+        titulo = self.obtener_parrafo(('TITULO', self.fuente_bold), "🏳️‍🌈 BINGO POLARI 🏳️‍⚧️",
+                                      self.estilo_titulo)
+        numero = Paragraph(f"<b>CARTÓN #{numero_carton:03d}</b>", self.estilo_numero)
         
         return [titulo, numero]
     
     def crear_elemento_carton_completo(self, numero_carton):
-        """Crea un elemento completo (encabezado + tabla) para un cartón"""
-        elementos = []
+        """Crea un elemento completo (encabezado + tabla) para un cartón. El título, la
+        rejilla y la casilla libre son iguales en todos los cartones: se dibujan una sola vez
+        por documento como Form XObject y cada cartón solo lo referencia."""
+        from reportlab.platypus import Spacer
+        from elementos_pdf import CartonConMarco
         
         # Encabezado compacto
-        encabezado = self.crear_encabezado_pride_compacto(numero_carton)
-        for elemento in encabezado:
-            elementos.append(elemento)
+        titulo, numero = self.crear_encabezado_pride_compacto(numero_carton)
         
         # Pequeño espacio entre encabezado y tabla
-        elementos.append(Spacer(1, 0.1*cm))
+        espacio = Spacer(1, 0.1*cm)
         
-        # Generar y añadir cartón
+        # Generar cartón
         carton = self.generar_carton(numero_carton)
-        tabla = self.crear_tabla_carton(carton, numero_carton)
-        elementos.append(tabla)
         
-        return elementos
+        def elementos_completos():
+            # Para cuando el cartón no cabe entero en la hoja: los flowables de siempre
+            return [titulo, numero, espacio, self.crear_tabla_carton(carton, numero_carton)]
+        
+        return [CartonConMarco(
+            f"MarcoTabla{self.cartones_por_pagina}", titulo, self.crear_tabla_marco(),
+            [numero, espacio, self.crear_tabla_carton(carton, numero_carton, parte='celdas')],
+            elementos_completos
+        )]
+    
+    def definir_marco_tabla(self, c, doc):
+        """Define en el canvas el marco común de los cartones de platypus, para montar en él
+        páginas dibujadas en otro documento (que solo lo referencian)"""
+        carton = self.crear_elemento_carton_completo(1)[0]
+        # Ancho y alto del Frame de SimpleDocTemplate (padding de 6 por lado)
+        carton.wrap(doc.width - 12, doc.height - 12)
+        carton.definir_marco(c)
     
     def crear_pagina_multiple_cartones(self, numeros_cartones):
         """Crea una página con múltiples cartones según configuración"""
+        from reportlab.platypus import Spacer
         elementos = []
         
         for i, num_carton in enumerate(numeros_cartones):
@@ -562,12 +1668,11 @@ class GeneradorBingoMusicalPride:
         
         return elementos
     
-    def generar_pdf(self, num_cartones, nombre_archivo="cartones_bingo_pride_spotify.pdf"):
-        """Genera el PDF con todos los cartones con tema Pride"""
-        print(f"\n🏳️‍🌈 Generando {num_cartones} cartones de bingo musical Pride desde Spotify ({self.cartones_por_pagina} por página)...")
-        
-        # Crear documento PDF con márgenes optimizados
-        doc = SimpleDocTemplate(
+    def crear_documento(self, nombre_archivo):
+        """Crea el documento PDF con márgenes optimizados"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+        return SimpleDocTemplate(
             nombre_archivo,
             pagesize=A4,
             rightMargin=0.4*cm,
@@ -575,34 +1680,1173 @@ class GeneradorBingoMusicalPride:
             topMargin=0.3*cm,
             bottomMargin=0.3*cm
         )
+    
+    def generar_pdf(self, num_cartones, nombre_archivo="cartones_bingo_pride_spotify.pdf", motor="platypus",
+                    paginas=None):
+        """Genera el PDF con todos los cartones con tema Pride (o solo el rango de páginas indicado)"""
+        if motor == "canvas":
+            return RenderizadorCanvas(self).generar_pdf(num_cartones, nombre_archivo, paginas)
+
+        print(f"\n🏳️‍🌈 Generando {num_cartones} cartones de bingo musical Pride desde Spotify ({self.cartones_por_pagina} por página)...")
+        
+        self.preparar_tamaños_tabla()
+        doc = self.crear_documento(nombre_archivo)
         
-        elementos = []
         num_paginas = (num_cartones + self.cartones_por_pagina - 1) // self.cartones_por_pagina
+        if paginas is None:
+            paginas = range(num_paginas)
+        progreso = IndicadorProgreso("Dibujando", len(paginas))
+        elementos = self.maquetar_paginas(num_cartones, paginas, al_dibujar_pagina=progreso.avanzar)
         
-        for pagina in range(num_paginas):
-            # Calcular qué cartones van en esta página
-            inicio = pagina * self.cartones_por_pagina + 1
-            fin = min((pagina + 1) * self.cartones_por_pagina, num_cartones)
-            numeros_cartones = range(inicio, fin + 1)
-            
-            print(f"  🌈 Generando página {pagina + 1}/{num_paginas} (cartones {inicio}-{fin})...")
-            
-            # Crear página con los cartones
-            elementos_pagina = self.crear_pagina_multiple_cartones(numeros_cartones)
-            
-            for elemento in elementos_pagina:
-                elementos.append(elemento)
-            
-            # Salto de página si no es la última
-            if pagina < num_paginas - 1:
-                elementos.append(PageBreak())
-        
-        # Construir PDF
+        # Construir PDF (el progreso avanza según reportlab empieza a dibujar cada página;
+        # con 4 por página una página de cartones puede ocupar más de una hoja)
         print("  🎨 Aplicando colores del arcoíris y formato mejorado...")
-        doc.build(elementos)
+        with self.metricas.fase('render'):
+            doc.build(elementos)
+        progreso.terminar()
+        print(f"  🧩 Caché de párrafos: {self.aciertos_cache_parrafos} aciertos, "
+              f"{self.fallos_cache_parrafos} fallos")
         print(f"🎉 ¡Listo! Se generaron {num_cartones} cartones Pride desde Spotify en {num_paginas} páginas en '{nombre_archivo}'")
         
         return nombre_archivo
+    
+    def maquetar_paginas(self, num_cartones, paginas, al_dibujar_pagina=None):
+        """Crea los flowables de las páginas indicadas, separadas por saltos de página. Si se
+        indica al_dibujar_pagina, se llama cuando reportlab empieza a dibujar cada una."""
+        from reportlab.platypus import PageBreak
+        from reportlab.platypus.flowables import CallerMacro
+        elementos = []
+        progreso = IndicadorProgreso("Maquetando", len(paginas))
+        with self.metricas.fase('maquetacion'):
+            for pagina in paginas:
+                # Calcular qué cartones van en esta página
+                inicio = pagina * self.cartones_por_pagina + 1
+                fin = min((pagina + 1) * self.cartones_por_pagina, num_cartones)
+                numeros_cartones = range(inicio, fin + 1)
+                
+                # Crear página con los cartones
+                if al_dibujar_pagina:
+                    elementos.append(CallerMacro(drawCallable=lambda macro: al_dibujar_pagina()))
+                elementos_pagina = self.crear_pagina_multiple_cartones(numeros_cartones)
+                
+                for elemento in elementos_pagina:
+                    elementos.append(elemento)
+                
+                # Salto de página si no es la última
+                if pagina < paginas[-1]:
+                    elementos.append(PageBreak())
+                progreso.avanzar()
+        progreso.terminar()
+        return elementos
+    
+    def generar_pdf_cartones(self, numeros_cartones, nombre_archivo, motor="platypus"):
+        """Genera un PDF solo con los cartones indicados (reimpresión de cartones perdidos o en disputa)"""
+        from reportlab.platypus import PageBreak
+        if motor == "canvas":
+            return RenderizadorCanvas(self).generar_pdf_cartones(numeros_cartones, nombre_archivo)
+        
+        self.preparar_tamaños_tabla()
+        doc = self.crear_documento(nombre_archivo)
+        elementos = []
+        for i in range(0, len(numeros_cartones), self.cartones_por_pagina):
+            if elementos:
+                elementos.append(PageBreak())
+            elementos.extend(self.crear_pagina_multiple_cartones(numeros_cartones[i:i + self.cartones_por_pagina]))
+        doc.build(elementos)
+        
+        return nombre_archivo
+    
+    def fijar_cartones(self, num_cartones):
+        """Fija las canciones de los cartones 1..num_cartones (si no lo están ya) y devuelve
+        sus posiciones de canción como lista de listas de 24 índices desde 0"""
+        for numero in range(1, num_cartones + 1):
+            if numero not in self.cartones_fijados:
+                self.cartones_fijados[numero] = self.sortear_indices_carton(numero)
+        return [self.cartones_fijados[numero] for numero in range(1, num_cartones + 1)]
+    
+    def mostrar_carton(self, numero_carton):
+        """Muestra en consola las canciones de un cartón para verificarlo"""
+        print(f"🔎 Cartón #{numero_carton:03d} (semilla {self.semilla}, huella {self.huella_canciones}):")
+        posiciones = [(fila, col) for fila in range(5) for col in range(5) if (fila, col) != (2, 2)]
+        for (fila, col), (indice, cancion) in zip(posiciones, self.seleccionar_canciones_carton(numero_carton)):
+            print(f"   Fila {fila + 1}, columna {col + 1}: #{indice:03d} {cancion}")
+    
+    def generar_pdf_paralelo(self, num_cartones, nombre_archivo="cartones_bingo_pride_spotify.pdf",
+                             motor="platypus", workers=2, dividir_salida=False):
+        """Genera el PDF repartiendo rangos de páginas completas entre varios procesos"""
+        self.asegurar_semilla()
+        
+        num_paginas = (num_cartones + self.cartones_por_pagina - 1) // self.cartones_por_pagina
+        workers = max(1, min(workers, num_paginas))
+        
+        # Fragmentos contiguos de páginas, tan equilibrados como sea posible
+        base, extension = os.path.splitext(nombre_archivo)
+        fragmentos = []
+        for i in range(workers):
+            paginas = range(i * num_paginas // workers, (i + 1) * num_paginas // workers)
+            fragmentos.append({
+                'canciones': self.canciones,
+                'cartones_fijados': {numero: self.cartones_fijados[numero]
+                                     for numero in range(paginas.start * self.cartones_por_pagina + 1,
+                                                         paginas.stop * self.cartones_por_pagina + 1)
+                                     if numero in self.cartones_fijados},
+                'nombre_fuente': self.nombre_fuente,
+                'tamaño_fuente': self.tamaño_fuente,
+                'ajustar_texto': self.ajustar_texto,
+                'matriz_cartones': self.matriz_cartones,
+                'cartones_por_pagina': self.cartones_por_pagina,
+                'semilla': self.semilla,
+                'motor': motor,
+                'num_cartones': num_cartones,
+                'paginas': paginas,
+                'nombre_archivo': f"{base}_parte{i + 1:02d}{extension or '.pdf'}",
+            })
+        
+        # multiprocessing solo se importa si de verdad se usan varios procesos
+        from concurrent.futures import ProcessPoolExecutor
+        
+        print(f"\n🏳️‍🌈 Generando {num_cartones} cartones en {workers} procesos ({num_paginas} páginas)...")
+        # Los tiempos de cada proceso no vuelven al padre: 'render' es el tiempo de reloj de todos
+        with self.metricas.fase('render'), ProcessPoolExecutor(max_workers=workers) as executor:
+            for fragmento, archivo in zip(fragmentos, executor.map(renderizar_fragmento, fragmentos)):
+                paginas = fragmento['paginas']
+                print(f"  🌈 Páginas {paginas[0] + 1}-{paginas[-1] + 1} listas en '{archivo}'")
+        
+        archivos = [fragmento['nombre_archivo'] for fragmento in fragmentos]
+        if dividir_salida:
+            print(f"🎉 ¡Listo! Se generaron {num_cartones} cartones Pride en {len(archivos)} archivos")
+            return archivos
+        
+        with self.metricas.fase('concatenacion'):
+            concatenador = ConcatenadorPDF(nombre_archivo)
+            for archivo in archivos:
+                concatenador.añadir(archivo)
+                os.remove(archivo)
+            concatenador.cerrar()
+        
+        print(f"🎉 ¡Listo! Se generaron {num_cartones} cartones Pride en {num_paginas} páginas en '{nombre_archivo}'")
+        return nombre_archivo
+    
+    def generar_pdf_por_lotes(self, num_cartones, nombre_archivo="cartones_bingo_pride_spotify.pdf",
+                              motor="platypus", paginas_por_lote=200):
+        """Genera el PDF en lotes de páginas de tamaño fijo que se vuelcan al archivo final
+        según se terminan, de modo que la memoria no crece con el número de cartones"""
+        num_paginas = (num_cartones + self.cartones_por_pagina - 1) // self.cartones_por_pagina
+        num_lotes = (num_paginas + paginas_por_lote - 1) // paginas_por_lote
+        print(f"\n🏳️‍🌈 Generando {num_cartones} cartones en {num_lotes} lotes de hasta {paginas_por_lote} páginas...")
+        
+        concatenador = ConcatenadorPDF(nombre_archivo)
+        progreso = IndicadorProgreso("Lotes", num_paginas)
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo_lote = os.path.join(directorio, "lote.pdf")
+            for lote in range(num_lotes):
+                paginas = range(lote * paginas_por_lote, min((lote + 1) * paginas_por_lote, num_paginas))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self.generar_pdf(num_cartones, archivo_lote, motor=motor, paginas=paginas)
+                with self.metricas.fase('concatenacion'):
+                    concatenador.añadir(archivo_lote)
+                progreso.avanzar(len(paginas))
+        concatenador.cerrar()
+        progreso.terminar()
+        
+        print(f"🎉 ¡Listo! Se generaron {num_cartones} cartones Pride en {num_paginas} páginas en '{nombre_archivo}'")
+        return nombre_archivo
+
+    def fuentes_pagina(self):
+        """Fuentes que puede usar una página, en un orden fijo"""
+        from reportlab.lib.fonts import tt2ps
+        return list(dict.fromkeys([self.fuente_normal, self.fuente_bold,
+                                   tt2ps(self.fuente_normal, 1, 0), tt2ps(self.fuente_bold, 1, 0)]))
+    
+    def fijar_codificacion(self, c):
+        """Registra en el documento, en un orden fijo, las fuentes y los códigos de todos los
+        caracteres posibles, de modo que el content stream de una página sea el mismo
+        sean cuales sean las páginas dibujadas antes. Devuelve el estado resultante."""
+        from reportlab.pdfbase import pdfmetrics
+        doc = c._doc
+        for nombre in self.fuentes_pagina():
+            fuente = pdfmetrics.getFont(nombre)
+            if fuente._dynamicFont:
+                fuente.splitString(self.TEXTO_CODIFICACION, doc)
+                fuente.getSubsetInternalName(0, doc)
+            else:
+                doc.getInternalFontName(nombre)
+        return self.estado_codificacion(c)
+    
+    def estado_codificacion(self, c):
+        """Fuentes registradas y caracteres con código en cada una (para detectar cambios)"""
+        from reportlab.pdfbase import pdfmetrics
+        doc = c._doc
+        asignados = []
+        for nombre in self.fuentes_pagina():
+            fuente = pdfmetrics.getFont(nombre)
+            estado = fuente.state.get(doc) if fuente._dynamicFont else None
+            asignados.append(len(estado.assignments) if estado else 0)
+        return len(doc.fontMapping), asignados
+    
+    def huella_pagina(self, num_cartones, pagina, motor):
+        """Clave de caché de una página: su número de cartones, sus canciones (con su texto)
+        y colores, y todo lo que cambia cómo se dibujan"""
+        from reportlab.pdfbase import pdfmetrics
+        import reportlab
+        inicio = pagina * self.cartones_por_pagina + 1
+        fin = min((pagina + 1) * self.cartones_por_pagina, num_cartones)
+        cartones = [(numero, self.seleccionar_canciones_carton(numero), self.sortear_colores_carton(numero))
+                    for numero in range(inicio, fin + 1)]
+        fuentes = [(nombre, getattr(getattr(pdfmetrics.getFont(nombre), 'face', None), 'name', None))
+                   for nombre in self.fuentes_pagina()]
+        material = [self.VERSION_CACHE_PAGINAS, reportlab.Version, motor, self.cartones_por_pagina,
+                    self.tamaño_fuente, self.ajustar_texto, fuentes, self.TEXTO_CODIFICACION, cartones]
+        return hashlib.sha256(json.dumps(material, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def capturar_pagina(c):
+        """Copia el contenido y los recursos propios de la hoja que el canvas acaba de cerrar"""
+        codigo = list(c._code)
+        if codigo and codigo[-1] == ' ':
+            codigo.pop()  # showPage añade un espacio al final
+        return {
+            'codigo': '\n'.join(codigo),
+            'estados': [[clave, valor, nombre] for (clave, valor), nombre in c._extgstate._c.items()],
+            'formularios': list(c._formsinuse),
+        }
+    
+    @classmethod
+    def estados_completos(cls, entrada):
+        """Si la hoja capturada define, cada uno con un nombre distinto, todos los estados
+        gráficos que nombra su contenido"""
+        nombres = [nombre for _, _, nombre in entrada['estados']]
+        return (len(set(nombres)) == len(nombres)
+                and set(cls.ESTADO_GRAFICO.findall(entrada['codigo'])) <= set(nombres))
+    
+    @classmethod
+    def pegar_pagina(cls, c, entrada):
+        """Añade una hoja capturada en otro documento con la misma codificación de fuentes.
+        Devuelve False, sin tocar el canvas, si sus estados gráficos no encajan con los de la
+        hoja en curso (el mismo nombre para otro estado o al revés)."""
+        actuales = c._extgstate._c
+        nombres_actuales = {nombre: estado for estado, nombre in actuales.items()}
+        estados = {(clave, valor): nombre for clave, valor, nombre in entrada['estados']}
+        if not cls.estados_completos(entrada) or any(
+            actuales.get(estado, nombre) != nombre or nombres_actuales.get(nombre, estado) != estado
+            for estado, nombre in estados.items()
+        ):
+            return False
+        c._code.append(entrada['codigo'])
+        actuales.update(estados)
+        c._formsinuse.extend(entrada['formularios'])
+        c.showPage()
+        return True
+    
+    def dibujar_paginas_sueltas(self, num_cartones, paginas, motor):
+        """Dibuja solo las páginas indicadas en un documento desechable y devuelve, para cada
+        una, el contenido de sus hojas (con platypus y 4 por página pueden ser varias), y si
+        la codificación de fuentes se mantuvo fija mientras tanto"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        capturadas = []
+        estables = []
+        
+        def empezar_pagina():
+            capturadas.append([])
+            progreso.avanzar()
+        
+        def preparar_canvas(c):
+            esperado = self.fijar_codificacion(c)
+            
+            def al_cerrar_pagina(numero):
+                hoja = self.capturar_pagina(c)
+                capturadas[-1].append(hoja)
+                estables.append(self.estado_codificacion(c) == esperado and self.estados_completos(hoja))
+            c.setPageCallBack(al_cerrar_pagina)
+            # El documento desechable no se llega a escribir (doc.build llama a save al final)
+            c.save = lambda: None
+            return c
+        
+        if motor == "canvas":
+            renderizador = RenderizadorCanvas(self)
+            renderizador.reiniciar_cache()
+            progreso = IndicadorProgreso("Dibujando", len(paginas))
+            with self.metricas.fase('render'):
+                c = preparar_canvas(canvas.Canvas(io.BytesIO(), pagesize=A4))
+                renderizador.definir_marco(c)
+                for pagina in paginas:
+                    empezar_pagina()
+                    renderizador.dibujar_pagina(c, num_cartones, pagina)
+                    c.showPage()
+        else:
+            self.preparar_tamaños_tabla()
+            progreso = IndicadorProgreso("Dibujando", len(paginas))
+            elementos = self.maquetar_paginas(num_cartones, paginas, al_dibujar_pagina=empezar_pagina)
+            with self.metricas.fase('render'):
+                self.crear_documento(io.BytesIO()).build(
+                    elementos, canvasmaker=lambda *args, **kwargs: preparar_canvas(canvas.Canvas(*args, **kwargs))
+                )
+        progreso.terminar()
+        
+        if len(capturadas) != len(paginas):
+            raise RuntimeError(f"Se esperaban {len(paginas)} páginas y se dibujaron {len(capturadas)}")
+        return capturadas, all(estables)
+    
+    def generar_pdf_incremental(self, num_cartones, nombre_archivo="cartones_bingo_pride_spotify.pdf",
+                                motor="platypus", cache=None):
+        """Genera el PDF reutilizando de la caché las páginas cuyo contenido no ha cambiado
+        desde otra ejecución y dibujando solo las demás"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        # Sin semilla cada ejecución sortearía cartones distintos
+        self.asegurar_semilla()
+        cache = cache or CachePaginas()
+        num_paginas = (num_cartones + self.cartones_por_pagina - 1) // self.cartones_por_pagina
+        print(f"\n🏳️‍🌈 Generando {num_cartones} cartones en {num_paginas} páginas con caché de páginas "
+              f"(motor {motor}, {self.cartones_por_pagina} por página)...")
+        
+        claves = [self.huella_pagina(num_cartones, pagina, motor) for pagina in range(num_paginas)]
+        entradas = [cache.leer(clave) for clave in claves]
+        faltan = [pagina for pagina, entrada in enumerate(entradas) if entrada is None]
+        self.metricas.contar('paginas_reutilizadas', num_paginas - len(faltan))
+        print(f"  🧩 Caché de páginas: {num_paginas - len(faltan)} reutilizadas, {len(faltan)} por dibujar")
+        
+        if faltan:
+            dibujadas, estable = self.dibujar_paginas_sueltas(num_cartones, faltan, motor)
+            if not estable:
+                # Las páginas dibujadas no se pueden mezclar con las de la caché
+                print("⚠️ Alguna página usó caracteres, fuentes o estados gráficos fuera de la "
+                      "codificación fija; se genera el PDF completo sin caché")
+                return self.generar_pdf(num_cartones, nombre_archivo, motor=motor)
+            for pagina, hojas in zip(faltan, dibujadas):
+                entradas[pagina] = {'hojas': hojas}
+                cache.guardar(claves[pagina], entradas[pagina])
+            cache.purgar()
+        
+        with self.metricas.fase('montaje'):
+            if motor == "canvas":
+                c = canvas.Canvas(nombre_archivo, pagesize=A4)
+                self.fijar_codificacion(c)
+                RenderizadorCanvas(self).definir_marco(c)
+            else:
+                # Mismo canvas (metadatos incluidos) que crearía doc.build
+                doc = self.crear_documento(nombre_archivo)
+                c = doc._makeCanvas()
+                self.fijar_codificacion(c)
+                self.definir_marco_tabla(c, doc)
+            encajan = all(self.pegar_pagina(c, hoja) for entrada in entradas for hoja in entrada['hojas'])
+            if encajan:
+                c.save()
+        if not encajan:
+            # El canvas a medio montar se descarta sin llegar a escribirse
+            print("⚠️ Los estados gráficos de una página de la caché no encajan con el documento; "
+                  "se genera el PDF completo sin caché")
+            return self.generar_pdf(num_cartones, nombre_archivo, motor=motor)
+        
+        print(f"🎉 ¡Listo! Se generaron {num_cartones} cartones Pride en {num_paginas} páginas en '{nombre_archivo}'")
+        return nombre_archivo
+
+def renderizar_fragmento(fragmento):
+    """Renderiza un rango de páginas en un proceso independiente (con su propio registro de fuentes)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        generador = GeneradorBingoMusicalPride(
+            canciones=fragmento['canciones'],
+            nombre_fuente=fragmento['nombre_fuente'],
+            tamaño_fuente=fragmento['tamaño_fuente'],
+            ajustar_texto=fragmento['ajustar_texto'],
+            matriz_cartones=fragmento['matriz_cartones'],
+            cartones_por_pagina=fragmento['cartones_por_pagina'],
+            semilla=fragmento['semilla']
+        )
+        generador.cartones_fijados = fragmento['cartones_fijados']
+        return generador.generar_pdf(
+            fragmento['num_cartones'],
+            fragmento['nombre_archivo'],
+            motor=fragmento['motor'],
+            paginas=fragmento['paginas']
+        )
+
+class IndiceCartonesUnicos:
+    """Índice de cartones ya emitidos para rechazar repetidos en O(1).
+
+    Cada cartón se guarda como máscara de bits sobre los índices de canciones.
+    Las máscaras exactas van en un set. Para exigir una distancia mínima d (canciones
+    distintas entre dos cartones) se usa un filtro de prefijo: si dos cartones difieren
+    en menos de d canciones comparten al menos 25-d, y sus tres canciones comunes de
+    menor índice están entre las d+2 de menor índice de cada uno. Cada cartón se apunta
+    en una cubeta por cada trío de esas d+2 canciones y solo se compara con popcount con
+    los cartones que comparten alguno de sus tríos. Un trío concreto sale en muy pocos
+    cartones, así que las cubetas siguen siendo pequeñas aunque crezca la tirada.
+    """
+
+    def __init__(self, num_canciones, distancia_minima=1):
+        self.distancia_minima = max(1, distancia_minima)
+        self.num_canciones = num_canciones
+        self.mascaras = set()
+        self.rechazados = 0
+        self.comparaciones = 0
+
+        # Con d > 22 dos cartones cercanos pueden compartir menos de tres canciones:
+        # no hay tríos que buscar y se compara con todos (solo tiene sentido con pocos cartones)
+        self.tam_prefijo = self.distancia_minima + 2 if 1 < self.distancia_minima <= 22 else 0
+        self.cubetas = {}
+
+    @staticmethod
+    def mascara(indices):
+        """Convierte las posiciones de las canciones de un cartón en máscara de bits"""
+        mascara = 0
+        for i in indices:
+            mascara |= 1 << i
+        return mascara
+
+    def claves(self, indices):
+        """Tríos (codificados como entero) de las canciones de menor índice del cartón"""
+        n = self.num_canciones
+        return [(a * n + b) * n + c
+                for a, b, c in itertools.combinations(sorted(indices)[:self.tam_prefijo], 3)]
+
+    def es_compatible(self, mascara, claves=()):
+        """Indica si el cartón cumple la distancia mínima con todos los ya añadidos"""
+        if mascara in self.mascaras:
+            return False
+        if self.distancia_minima == 1:
+            return True
+
+        # Diferencias = popcount(a ^ b) / 2, porque ambos cartones tienen 24 canciones
+        limite = 2 * self.distancia_minima
+        if self.tam_prefijo:
+            candidatos = {otra for clave in claves for otra in self.cubetas.get(clave, ())}
+        else:
+            candidatos = self.mascaras
+        self.comparaciones += len(candidatos)
+        for otra in candidatos:
+            if bin(mascara ^ otra).count('1') < limite:
+                return False
+        return True
+
+    def añadir(self, indices, comprobar=True):
+        """Añade el cartón si es compatible; devuelve False (y cuenta el rechazo) si no.
+        Con comprobar=False se añade sin más (cartones ya emitidos que no se pueden cambiar)."""
+        mascara = self.mascara(indices)
+        claves = self.claves(indices) if self.tam_prefijo else ()
+        if comprobar and not self.es_compatible(mascara, claves):
+            self.rechazados += 1
+            return False
+
+        self.mascaras.add(mascara)
+        for clave in claves:
+            self.cubetas.setdefault(clave, []).append(mascara)
+        return True
+
+    def __len__(self):
+        return len(self.mascaras)
+
+class RenderizadorCanvas:
+    """Motor de renderizado que dibuja los cartones directamente sobre el canvas,
+    sin pasar por Table/Paragraph de platypus"""
+
+    def __init__(self, generador):
+        self.generador = generador
+        self.calcular_geometria()
+
+    def calcular_geometria(self):
+        """Precalcula posiciones y medidas de la página según cartones por página"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.fonts import tt2ps
+        from reportlab.lib.rl_accel import fp_str
+        g = self.generador
+        self.ancho_pagina, self.alto_pagina = A4
+
+        # Mismos márgenes que SimpleDocTemplate más el padding de 6pt del Frame
+        x_frame = 0.4*cm + 6
+        ancho_frame = self.ancho_pagina - 0.8*cm - 12
+        y_superior = self.alto_pagina - 0.3*cm - 6
+        alto_frame = self.alto_pagina - 0.6*cm - 12
+        self.centro_x = x_frame + ancho_frame / 2
+
+        # Mismas medidas de celda que crear_tabla_carton
+        self.col_width = 3.6 * cm if g.cartones_por_pagina == 2 else 3.2 * cm
+        self.row_height = 2.0 * cm if g.cartones_por_pagina == 2 else 1.8 * cm
+
+        # Encabezado: título (leading 12) + número (leading 12) + spaceAfter de ambos + Spacer
+        self.alto_encabezado = 12 + 0.02*cm + 12 + 0.02*cm + 0.1*cm
+        separacion = 0.4*cm
+
+        # Si los cartones no caben apilados en la página, se reduce la altura de fila
+        n = g.cartones_por_pagina
+        alto_disponible = alto_frame - (n - 1) * separacion - n * self.alto_encabezado
+        if 5 * self.row_height * n > alto_disponible:
+            self.row_height = alto_disponible / (5 * n)
+
+        alto_bloque = self.alto_encabezado + 5 * self.row_height
+        self.y_cartones = [y_superior - i * (alto_bloque + separacion) for i in range(n)]
+        self.x_tabla = x_frame + (ancho_frame - 5 * self.col_width) / 2
+
+        # Fuentes equivalentes a las que resuelve Paragraph para <b>
+        self.fuente_indice = tt2ps(g.fuente_normal, 1, 0)
+        self.fuente_negrita = tt2ps(g.fuente_bold, 1, 0)
+        self.ancho_texto = self.col_width - 12  # padding de celda (4+4) + indentación (2+2)
+
+        # Operadores PDF precalculados, relativos a la parte superior del cartón
+        w, h = self.col_width, self.row_height
+        y0 = -self.alto_encabezado
+        self.alto_bloque = alto_bloque
+        self.celdas = [(self.x_tabla + col * w + w / 2, y0 - fila * h)
+                       for fila in range(5) for col in range(5)]
+        self.rectangulos = [f"{fp_str(self.x_tabla + col * w, y0 - (fila + 1) * h, w, h)} re"
+                            for fila in range(5) for col in range(5)]
+        self.nombre_marco = f"MarcoCarton{n}"
+
+        # Tamaños ajustados al alto de fila real (menor con 4 cartones por página)
+        g.preparar_tamaños_canciones(self.ancho_texto, self.row_height - 12)
+
+    def reiniciar_cache(self):
+        """Vacía los fragmentos de texto cacheados (dependen del documento por el subsetting de fuentes)"""
+        self.lineas_por_cancion = {}
+        self.codigo_por_cancion = {}
+
+    def lineas_cancion(self, indice, cancion):
+        """Devuelve las líneas ya partidas del título de una canción (memoizadas por índice)"""
+        lineas = self.lineas_por_cancion.get(indice)
+        if lineas is None:
+            g = self.generador
+            texto = g.normalizador.titulo(cancion)
+            lineas = g.medidor.partir_lineas(texto, g.fuente_normal, g.tamaño_cancion(indice) - 1, self.ancho_texto)
+            self.lineas_por_cancion[indice] = lineas
+        return lineas
+
+    def codigo_cancion(self, c, indice, cancion):
+        """Devuelve el bloque de texto de una celda relativo al centro superior de la celda"""
+        codigo = self.codigo_por_cancion.get(indice)
+        if codigo is None:
+            from reportlab.pdfbase import pdfmetrics
+            g = self.generador
+            tamaño = g.tamaño_cancion(indice)
+            leading = tamaño + 1
+            lineas = self.lineas_cancion(indice, cancion)
+
+            # Centrado vertical igual que VALIGN MIDDLE: líneas * leading + spaceBefore + spaceAfter
+            alto_parrafo = (len(lineas) + 1) * leading + 2
+            y = -6 - (self.row_height - 12 - alto_parrafo) / 2 - 1 - tamaño
+
+            t = c.beginText()
+            texto_indice = f"#{indice:03d}"
+            t.setFont(self.fuente_indice, tamaño, leading)
+            t.setTextOrigin(-pdfmetrics.stringWidth(texto_indice, self.fuente_indice, tamaño) / 2, y)
+            t.textOut(texto_indice)
+            t.setFont(g.fuente_normal, tamaño - 1, leading)
+            for linea in lineas:
+                y -= leading
+                t.setTextOrigin(-pdfmetrics.stringWidth(linea, g.fuente_normal, tamaño - 1) / 2, y)
+                t.textOut(linea)
+            codigo = t.getCode()
+            self.codigo_por_cancion[indice] = codigo
+        return codigo
+
+    def definir_marco(self, c):
+        """Dibuja una sola vez, como Form XObject, la parte fija de un cartón:
+        título, casilla LIBRE y rejilla. Cada cartón lo referencia con doForm."""
+        g = self.generador
+        tamaño = g.tamaño_fuente
+        w, h = self.col_width, self.row_height
+        y0 = -self.alto_encabezado
+
+        c.beginForm(self.nombre_marco, lowerx=0, lowery=-self.alto_bloque - 2,
+                    upperx=self.ancho_pagina, uppery=2)
+
+        # Título
+        c.setFont(g.fuente_bold, 12)
+        c.setFillColor(g.colores_pride['morado'])
+        c.drawCentredString(self.centro_x, -12, "🏳️‍🌈 BINGO POLARI 🏳️‍⚧️")
+
+        # Casilla libre: fondo dorado y texto. El Form XObject no lleva sus propios
+        # ExtGState, así que el dorado al 40% se precompone sobre blanco (opaco)
+        x_libre, y_libre = self.celdas[12]
+        c.setFillColorRGB(1.0, 0.4 * 0.84 + 0.6, 0.6)
+        c.rect(x_libre - w / 2, y_libre - h, w, h, stroke=0, fill=1)
+        c.setFillColor(g.colores_pride['morado'])
+        c.setFont(self.fuente_negrita, tamaño + 1)
+        y_texto = y_libre - 6 - (h - 12 - (tamaño + 2)) / 2 - (tamaño + 1)
+        c.drawCentredString(x_libre, y_texto, "🎵 LIBRE 🎵")
+
+        # Rejilla
+        c.setStrokeColor(g.colores_pride['morado'])
+        c.setLineWidth(1.5)
+        c.setLineCap(1)
+        c.setLineJoin(1)
+        lineas = [(self.x_tabla, y0 - i * h, self.x_tabla + 5 * w, y0 - i * h) for i in range(6)]
+        lineas += [(self.x_tabla + i * w, y0, self.x_tabla + i * w, y0 - 5 * h) for i in range(6)]
+        c.lines(lineas)
+
+        c.endForm()
+
+    def dibujar_carton(self, c, numero_carton, posicion):
+        """Dibuja un cartón: fondos, textos y número propios del cartón más el marco común"""
+        from reportlab.lib import colors
+        from reportlab.lib.rl_accel import fp_str
+        g = self.generador
+
+        c.saveState()
+        c.translate(0, self.y_cartones[posicion])
+
+        canciones = g.seleccionar_canciones_carton(numero_carton)
+
+        # Fondos de celda (mismo orden de colores aleatorios que crear_tabla_carton),
+        # agrupados por color para emitir un solo cambio de color por tono
+        colores_celdas = iter(g.sortear_colores_carton(numero_carton))
+        celdas_por_color = {}
+        for i, rectangulo in enumerate(self.rectangulos):
+            if i == 12:
+                continue
+            color = g.colores_pride[g.PALETA_CELDAS[next(colores_celdas)]]
+            celdas_por_color.setdefault((color.red, color.green, color.blue), []).append(rectangulo)
+        for (r, v, a), rects in celdas_por_color.items():
+            c.setFillColorRGB(r, v, a, alpha=0.2)
+            c.addLiteral(f"{' '.join(rects)} f")
+
+        # Textos de las celdas
+        c.setFillColor(colors.black)
+        codigos = []
+        contador = 0
+        for i, (x, y_celda) in enumerate(self.celdas):
+            if i == 12:
+                continue
+            indice, cancion = canciones[contador]
+            contador += 1
+            codigo = self.codigo_cancion(c, indice, cancion)
+            codigos.append(f"q 1 0 0 1 {fp_str(x, y_celda)} cm {codigo} Q")
+        c.addLiteral("\n".join(codigos))
+
+        # Número de cartón
+        c.setFont(self.fuente_negrita, 9)
+        c.setFillColor(g.colores_pride['rosa'])
+        c.drawCentredString(self.centro_x, -12 - 0.02*cm - 9, f"CARTÓN #{numero_carton:03d}")
+
+        c.doForm(self.nombre_marco)
+        c.restoreState()
+
+    def dibujar_pagina(self, c, num_cartones, pagina):
+        """Dibuja los cartones de una página (sin cerrarla)"""
+        g = self.generador
+        inicio = pagina * g.cartones_por_pagina + 1
+        fin = min((pagina + 1) * g.cartones_por_pagina, num_cartones)
+        for posicion, num_carton in enumerate(range(inicio, fin + 1)):
+            self.dibujar_carton(c, num_carton, posicion)
+
+    def generar_pdf(self, num_cartones, nombre_archivo, paginas=None):
+        """Genera el PDF dibujando cada página directamente en el canvas"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        g = self.generador
+        print(f"\n🏳️‍🌈 Generando {num_cartones} cartones de bingo musical Pride (motor canvas, {g.cartones_por_pagina} por página)...")
+
+        self.reiniciar_cache()
+        c = canvas.Canvas(nombre_archivo, pagesize=A4)
+        num_paginas = (num_cartones + g.cartones_por_pagina - 1) // g.cartones_por_pagina
+        self.definir_marco(c)
+        if paginas is None:
+            paginas = range(num_paginas)
+
+        progreso = IndicadorProgreso("Dibujando", len(paginas))
+        with g.metricas.fase('render'):
+            for pagina in paginas:
+                self.dibujar_pagina(c, num_cartones, pagina)
+                c.showPage()
+                progreso.avanzar()
+
+            c.save()
+        progreso.terminar()
+        print(f"🎉 ¡Listo! Se generaron {num_cartones} cartones Pride en {num_paginas} páginas en '{nombre_archivo}'")
+
+        return nombre_archivo
+
+    def generar_pdf_cartones(self, numeros_cartones, nombre_archivo):
+        """Genera un PDF solo con los cartones indicados"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        g = self.generador
+        self.reiniciar_cache()
+        c = canvas.Canvas(nombre_archivo, pagesize=A4)
+        self.definir_marco(c)
+
+        for i in range(0, len(numeros_cartones), g.cartones_por_pagina):
+            for posicion, num_carton in enumerate(numeros_cartones[i:i + g.cartones_por_pagina]):
+                self.dibujar_carton(c, num_carton, posicion)
+            c.showPage()
+
+        c.save()
+        return nombre_archivo
+
+class SimuladorPartidas:
+    """Simula muchas partidas sobre un conjunto de cartones para estimar cuántas canciones
+    hay que tocar hasta el primer ganador de cada patrón (línea, diagonal, cartón lleno).
+
+    Para cada partida se sortea el turno en que sale cada canción; el turno en que un
+    cartón completa un patrón es el máximo de los turnos de sus casillas, y el primer
+    ganador es el mínimo entre todos los cartones. Todo se calcula con NumPy por lotes
+    de partidas.
+    """
+
+    PATRONES = ('linea', 'diagonal', 'carton_lleno')
+    NOMBRES_PATRONES = {'linea': 'Línea', 'diagonal': 'Diagonal', 'carton_lleno': 'Cartón lleno'}
+
+    def __init__(self, cartones, num_canciones):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("La simulación necesita numpy: pip install numpy")
+        self.np = np
+        self.num_canciones = num_canciones
+
+        # Matriz N×25 de posiciones de canción; la casilla libre apunta a una canción
+        # ficticia (num_canciones) que siempre sale en el turno 0
+        cartones = np.asarray(cartones, dtype=np.intp)
+        self.cartones = np.insert(cartones, 12, num_canciones, axis=1)
+
+    def simular(self, num_partidas, semilla=None, partidas_por_lote=64):
+        """Simula num_partidas órdenes de canciones y devuelve, por patrón, el número de
+        canciones tocadas hasta el primer ganador y cuántos cartones ganan a la vez"""
+        np = self.np
+        rng = np.random.default_rng(semilla)
+        num_cartones = len(self.cartones)
+        tipo = np.uint16 if self.num_canciones < 2**16 else np.uint32
+        turnos_base = np.tile(np.arange(1, self.num_canciones + 1, dtype=tipo), (partidas_por_lote, 1))
+        turno_libre = np.zeros((partidas_por_lote, 1), dtype=tipo)
+
+        resultados = {patron: ([], []) for patron in self.PATRONES}
+        for inicio in range(0, num_partidas, partidas_por_lote):
+            lote = min(partidas_por_lote, num_partidas - inicio)
+
+            # Una permutación aleatoria de 1..S es el turno (1-based) de cada canción
+            turnos = np.concatenate([rng.permuted(turnos_base[:lote], axis=1), turno_libre[:lote]], axis=1)
+            casillas = turnos[:, self.cartones].reshape(lote, num_cartones, 5, 5)
+
+            filas = casillas.max(axis=3)
+            columnas = casillas.max(axis=2)
+            diagonal = np.maximum.reduce([casillas[:, :, i, i] for i in range(5)])
+            antidiagonal = np.maximum.reduce([casillas[:, :, i, 4 - i] for i in range(5)])
+
+            por_carton = {
+                'linea': np.minimum(filas.min(axis=2), columnas.min(axis=2)),
+                'diagonal': np.minimum(diagonal, antidiagonal),
+                'carton_lleno': filas.max(axis=2),
+            }
+            for patron, turnos_carton in por_carton.items():
+                primero = turnos_carton.min(axis=1)
+                resultados[patron][0].append(primero)
+                resultados[patron][1].append((turnos_carton == primero[:, None]).sum(axis=1))
+
+        return {
+            patron: {
+                'canciones': np.concatenate(primeros).astype(np.int64),
+                'ganadores': np.concatenate(ganadores),
+            }
+            for patron, (primeros, ganadores) in resultados.items()
+        }
+
+    def resumen(self, resultados):
+        """Resume la distribución de canciones necesarias por patrón"""
+        np = self.np
+        resumen = {}
+        for patron, datos in resultados.items():
+            canciones = datos['canciones']
+            p5, p25, p50, p75, p95 = np.percentile(canciones, [5, 25, 50, 75, 95])
+            resumen[patron] = {
+                'min': int(canciones.min()),
+                'p5': float(p5),
+                'p25': float(p25),
+                'mediana': float(p50),
+                'p75': float(p75),
+                'p95': float(p95),
+                'max': int(canciones.max()),
+                'media': float(canciones.mean()),
+                'ganadores_simultaneos': float(datos['ganadores'].mean()),
+            }
+        return resumen
+
+    def mostrar_resumen(self, resumen, num_partidas):
+        """Imprime el resumen de la simulación"""
+        print(f"\n🎲 Simulación de {num_partidas} partidas con {len(self.cartones)} cartones "
+              f"y {self.num_canciones} canciones")
+        print(f"   {'Patrón':<13}{'mín':>6}{'p5':>7}{'p25':>7}{'mediana':>9}{'p75':>7}{'p95':>7}{'máx':>6}"
+              f"{'media':>8}  ganadores a la vez")
+        for patron in self.PATRONES:
+            r = resumen[patron]
+            print(f"   {self.NOMBRES_PATRONES[patron]:<13}{r['min']:>6}{r['p5']:>7.0f}{r['p25']:>7.0f}"
+                  f"{r['mediana']:>9.0f}{r['p75']:>7.0f}{r['p95']:>7.0f}{r['max']:>6}{r['media']:>8.1f}"
+                  f"  {r['ganadores_simultaneos']:.2f}")
+        print("   (canciones tocadas hasta el primer ganador)")
+
+class CantorBingo:
+    """Lleva el estado de una partida en vivo: al cantar cada canción actualiza solo los
+    cartones que la contienen (índice invertido canción -> [(cartón, casilla)]) y
+    devuelve los patrones que se acaban de completar"""
+
+    # Contadores por cartón: 5 filas, 5 columnas, diagonal, antidiagonal y total
+    DIAGONAL, ANTIDIAGONAL, TOTAL = 10, 11, 12
+
+    def __init__(self, cartones, numero_inicial=1):
+        self.numero_inicial = numero_inicial
+        self.cantadas = []
+        self.sonadas = set()
+        self.indice = {}
+
+        # Contadores de cada casilla del 5x5
+        self.contadores_casilla = []
+        for casilla in range(25):
+            fila, col = divmod(casilla, 5)
+            contadores = [fila, 5 + col, self.TOTAL]
+            if fila == col:
+                contadores.append(self.DIAGONAL)
+            if fila + col == 4:
+                contadores.append(self.ANTIDIAGONAL)
+            self.contadores_casilla.append(contadores)
+
+        # La casilla libre cuenta como marcada desde el principio
+        marcados_iniciales = [0] * 13
+        for contador in self.contadores_casilla[12]:
+            marcados_iniciales[contador] += 1
+
+        self.marcados = []
+        for carton, indices in enumerate(cartones):
+            self.marcados.append(list(marcados_iniciales))
+            casillas = [c for c in range(25) if c != 12]
+            for casilla, indice in zip(casillas, indices):
+                self.indice.setdefault(indice, []).append((carton, casilla))
+
+    def describir_contador(self, contador):
+        """Nombre legible de un contador completado"""
+        if contador < 5:
+            return f"línea (fila {contador + 1})"
+        if contador < 10:
+            return f"línea (columna {contador - 4})"
+        if contador == self.DIAGONAL:
+            return "diagonal"
+        if contador == self.ANTIDIAGONAL:
+            return "diagonal inversa"
+        return "¡CARTÓN LLENO!"
+
+    def cantar(self, indice_cancion):
+        """Marca una canción (índice desde 0) y devuelve [(número de cartón, patrón)]
+        con los patrones que se completan con ella"""
+        if indice_cancion in self.sonadas:
+            return []
+        self.cantadas.append(indice_cancion)
+        self.sonadas.add(indice_cancion)
+
+        completados = []
+        for carton, casilla in self.indice.get(indice_cancion, ()):
+            marcados = self.marcados[carton]
+            for contador in self.contadores_casilla[casilla]:
+                marcados[contador] += 1
+                if marcados[contador] == (25 if contador == self.TOTAL else 5):
+                    completados.append((self.numero_inicial + carton, self.describir_contador(contador)))
+        return completados
+
+    def canciones_marcadas(self, numero_carton, cartones):
+        """Devuelve las posiciones de canción de un cartón que ya han sonado"""
+        return [i for i in cartones[numero_carton - self.numero_inicial] if i in self.sonadas]
+
+def consola_cantor(generador, cartones, numero_inicial=1):
+    """Consola interactiva para el presentador: se introduce el #NNN de cada canción tocada
+    y se listan al momento los cartones que completan línea, diagonal o cartón lleno"""
+    cantor = CantorBingo(cartones, numero_inicial)
+    ultimo_carton = numero_inicial + len(cartones) - 1
+
+    print(f"\n🎤 Modo presentador: {len(cartones)} cartones, {len(generador.canciones)} canciones")
+    print("   Escribe el número de la canción tocada (ej: 137 o #137),")
+    print("   'v N' para verificar el cartón N y 'salir' para terminar.")
+
+    while True:
+        try:
+            entrada = input("🎵 > ").strip().lower()
+        except EOFError:
+            break
+        if entrada in ('salir', 'q', 'exit'):
+            break
+        if not entrada:
+            continue
+
+        if entrada.startswith('v'):
+            try:
+                numero = int(entrada[1:].strip().lstrip('#'))
+            except ValueError:
+                print("   ❓ Uso: v NÚMERO_DE_CARTÓN")
+                continue
+            if not numero_inicial <= numero <= ultimo_carton:
+                print(f"   ❓ El cartón debe estar entre {numero_inicial} y {ultimo_carton}")
+                continue
+            marcadas = cantor.canciones_marcadas(numero, cartones)
+            print(f"   🔎 Cartón #{numero:03d}: {len(marcadas)}/24 canciones tocadas")
+            for i in marcadas:
+                print(f"      #{i + 1:03d} {generador.canciones[i]}")
+            continue
+
+        try:
+            indice = int(entrada.lstrip('#')) - 1
+        except ValueError:
+            print("   ❓ Entrada no reconocida")
+            continue
+        if not 0 <= indice < len(generador.canciones):
+            print(f"   ❓ La canción debe estar entre 1 y {len(generador.canciones)}")
+            continue
+        if indice in cantor.sonadas:
+            print("   ↩️ Esa canción ya había sonado")
+            continue
+
+        completados = cantor.cantar(indice)
+        print(f"   ✅ #{indice + 1:03d} {generador.canciones[indice]} ({len(cantor.cantadas)} tocadas)")
+        for numero, patron in completados:
+            print(f"   🎉 Cartón #{numero:03d}: {patron}")
+
+class ConcatenadorPDF:
+    """Escribe un PDF añadiendo uno tras otro las páginas de otros PDFs. Cada objeto se
+    escribe en cuanto se lee, así que en memoria solo hay un PDF de entrada a la vez."""
+
+    def __init__(self, nombre_archivo):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ImportError("Para unir PDFs instala pypdf: pip install pypdf")
+        self.PdfReader = PdfReader
+
+        self.archivo = open(nombre_archivo, 'wb')
+        self.archivo.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # 1 = catálogo y 2 = árbol de páginas; se escriben al cerrar
+        self.desplazamientos = [None, None, None]
+        self.paginas = []
+
+    def reservar(self):
+        """Reserva un número de objeto nuevo en el PDF de salida"""
+        self.desplazamientos.append(None)
+        return len(self.desplazamientos) - 1
+
+    def escribir_objeto(self, numero, objeto):
+        """Escribe un objeto indirecto ya renumerado"""
+        self.desplazamientos[numero] = self.archivo.tell()
+        self.archivo.write(f"{numero} 0 obj\n".encode())
+        objeto.write_to_stream(self.archivo)
+        self.archivo.write(b"\nendobj\n")
+
+    def renumerar(self, objeto, numeros, pendientes):
+        """Sustituye las referencias del PDF de entrada por números del PDF de salida"""
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject
+        if isinstance(objeto, IndirectObject):
+            numero = numeros.get(objeto.idnum)
+            if numero is None:
+                numero = numeros[objeto.idnum] = self.reservar()
+                pendientes.append((objeto, numero))
+            return IndirectObject(numero, 0, None)
+        if isinstance(objeto, DictionaryObject):
+            for clave, valor in list(dict.items(objeto)):
+                dict.__setitem__(objeto, clave, self.renumerar(valor, numeros, pendientes))
+        elif isinstance(objeto, ArrayObject):
+            for i, valor in enumerate(list.__iter__(objeto)):
+                list.__setitem__(objeto, i, self.renumerar(valor, numeros, pendientes))
+        return objeto
+
+    def añadir(self, nombre_archivo):
+        """Añade al final todas las páginas de un PDF"""
+        from pypdf.generic import IndirectObject, NameObject
+        lector = self.PdfReader(nombre_archivo)
+        numeros = {}
+        pendientes = []
+        for pagina in lector.pages:
+            numero = self.reservar()
+            self.paginas.append(numero)
+            numeros[pagina.indirect_reference.idnum] = numero
+            dict.pop(pagina, "/Parent", None)
+            pagina = self.renumerar(pagina, numeros, pendientes)
+            dict.__setitem__(pagina, NameObject("/Parent"), IndirectObject(2, 0, None))
+            self.escribir_objeto(numero, pagina)
+            while pendientes:
+                referencia, numero = pendientes.pop()
+                objeto = self.renumerar(referencia.get_object(), numeros, pendientes)
+                self.escribir_objeto(numero, objeto)
+
+    def cerrar(self):
+        """Escribe el árbol de páginas, el catálogo y la tabla xref"""
+        hijos = " ".join(f"{numero} 0 R" for numero in self.paginas)
+        for numero, cuerpo in (
+            (2, f"<< /Type /Pages /Kids [ {hijos} ] /Count {len(self.paginas)} >>"),
+            (1, "<< /Type /Catalog /Pages 2 0 R >>"),
+        ):
+            self.desplazamientos[numero] = self.archivo.tell()
+            self.archivo.write(f"{numero} 0 obj\n{cuerpo}\nendobj\n".encode())
+
+        inicio_xref = self.archivo.tell()
+        lineas = [f"xref\n0 {len(self.desplazamientos)}\n", "0000000000 65535 f \n"]
+        lineas += [f"{desplazamiento:010d} 00000 n \n" for desplazamiento in self.desplazamientos[1:]]
+        self.archivo.write("".join(lineas).encode())
+        self.archivo.write(
+            f"trailer\n<< /Size {len(self.desplazamientos)} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+        )
+        self.archivo.close()
+
+class ManifiestoCartones:
+    """Manifiesto binario de una tirada: qué canciones y colores lleva cada cartón.
+    
+    Formato (little-endian, registros de ancho fijo):
+      cabecera (64 bytes): firma, versión, nº de cartones, primer número de cartón,
+                           nº de canciones, semilla (int64), huella de canciones (8 bytes),
+                           distancia mínima (uint16, 0 = sin unicidad) y opciones (uint8)
+      registro (72 bytes): 24 x uint16 posición de canción (desde 0, en orden de casilla)
+                           + 24 x uint8 color de fondo (posición en PALETA_CELDAS)
+    
+    El lector abre el archivo con mmap, así que consultar el cartón k no carga el resto;
+    hay que cerrarlo (o usarlo con `with`) para liberar el mmap y el archivo."""
+    
+    FIRMA = b"BINGOPR\x00"
+    VERSION = 1
+    CABECERA = struct.Struct("<8sHHIIIq8sHB21x")
+    # Bits del byte de opciones. Los manifiestos anteriores a estos campos tienen ahí ceros
+    # (eran bytes reservados): sin OPCION_REGISTRADAS no se sabe cómo se sortearon.
+    OPCION_UNICOS = 0x01
+    OPCION_MATRIZ = 0x02
+    OPCION_EQUILIBRADO = 0x04
+    OPCION_REGISTRADAS = 0x80
+    REGISTRO = struct.Struct("<24H24B")
+    
+    def __init__(self, nombre_archivo):
+        self.nombre_archivo = nombre_archivo
+        with open(nombre_archivo, 'rb') as archivo:
+            self.datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.leer_cabecera()
+        except Exception:
+            self.cerrar()
+            raise
+    
+    def leer_cabecera(self):
+        """Valida la cabecera del archivo y lee sus campos"""
+        nombre_archivo = self.nombre_archivo
+        if len(self.datos) < self.CABECERA.size:
+            raise ValueError(f"'{nombre_archivo}' no es un manifiesto de cartones")
+        (firma, version, _, self.num_cartones, self.numero_inicial, self.num_canciones,
+         self.semilla, huella, distancia, opciones) = self.CABECERA.unpack_from(self.datos, 0)
+        if firma != self.FIRMA:
+            raise ValueError(f"'{nombre_archivo}' no es un manifiesto de cartones")
+        if version != self.VERSION:
+            raise ValueError(f"Versión de manifiesto no soportada: {version}")
+        if len(self.datos) < self.CABECERA.size + self.num_cartones * self.REGISTRO.size:
+            raise ValueError(f"Manifiesto '{nombre_archivo}' incompleto")
+        self.huella_canciones = huella.hex()
+        self.ajustes_registrados = bool(opciones & self.OPCION_REGISTRADAS)
+        self.distancia_minima = distancia if opciones & self.OPCION_UNICOS else None
+        self.matriz_cartones = bool(opciones & self.OPCION_MATRIZ)
+        self.equilibrado = bool(opciones & self.OPCION_EQUILIBRADO)
+    
+    @classmethod
+    def escribir(cls, nombre_archivo, generador, num_cartones, numero_inicial=1, anterior=None):
+        """Escribe el manifiesto de los cartones numero_inicial..numero_inicial+num_cartones-1,
+        registro a registro (la tirada debe tener semilla para poder regenerarse). Con un
+        manifiesto anterior, copia primero sus registros tal cual y numera los nuevos a
+        continuación de su último cartón."""
+        if generador.semilla is None:
+            raise ValueError("El manifiesto necesita una tirada con semilla")
+        if not -2**63 <= generador.semilla < 2**63:
+            raise ValueError("La semilla no cabe en el manifiesto (debe ser un entero de 64 bits)")
+        if len(generador.canciones) > 0xFFFF:
+            raise ValueError("El manifiesto admite como máximo 65535 canciones")
+        
+        copiados = b""
+        total = num_cartones
+        if anterior is not None:
+            copiados = anterior.datos[cls.CABECERA.size:cls.CABECERA.size + len(anterior) * cls.REGISTRO.size]
+            total += len(anterior)
+            numero_inicial = anterior.numero_inicial + len(anterior)
+        
+        # Ajustes del sorteo, para que una continuación sortee los cartones nuevos igual
+        opciones = cls.OPCION_REGISTRADAS
+        if generador.distancia_minima:
+            opciones |= cls.OPCION_UNICOS
+        if generador.matriz_cartones:
+            opciones |= cls.OPCION_MATRIZ
+        if generador.equilibrado or (anterior is not None and anterior.equilibrado):
+            opciones |= cls.OPCION_EQUILIBRADO
+        
+        with open(nombre_archivo, 'wb') as archivo:
+            archivo.write(cls.CABECERA.pack(
+                cls.FIRMA, cls.VERSION, 0, total, numero_inicial - (total - num_cartones),
+                len(generador.canciones), generador.semilla, bytes.fromhex(generador.huella_canciones),
+                generador.distancia_minima or 0, opciones
+            ))
+            archivo.write(copiados)
+            for numero in range(numero_inicial, numero_inicial + num_cartones):
+                archivo.write(cls.REGISTRO.pack(
+                    *generador.indices_carton(numero), *generador.sortear_colores_carton(numero)
+                ))
+        return nombre_archivo
+    
+    @staticmethod
+    def ruta_para(nombre_pdf):
+        """Ruta del manifiesto que acompaña a un PDF"""
+        return os.path.splitext(nombre_pdf)[0] + ".manifiesto"
+    
+    def __len__(self):
+        return self.num_cartones
+    
+    def __getitem__(self, posicion):
+        """Posiciones de canción del cartón en la posición indicada (desde 0), para usar
+        el manifiesto como lista de cartones"""
+        if not 0 <= posicion < self.num_cartones:
+            raise IndexError(posicion)
+        return list(self.REGISTRO.unpack_from(self.datos, self.CABECERA.size + posicion * self.REGISTRO.size)[:24])
+    
+    def carton(self, numero_carton):
+        """Devuelve (posiciones de canción, colores de fondo) del cartón indicado"""
+        posicion = numero_carton - self.numero_inicial
+        if not 0 <= posicion < self.num_cartones:
+            raise ValueError(f"El cartón #{numero_carton:03d} no está en el manifiesto "
+                             f"({self.numero_inicial}-{self.numero_inicial + self.num_cartones - 1})")
+        registro = self.REGISTRO.unpack_from(self.datos, self.CABECERA.size + posicion * self.REGISTRO.size)
+        return list(registro[:24]), list(registro[24:])
+    
+    def exportar(self, nombre_archivo, canciones=None):
+        """Exporta el manifiesto a JSON o CSV (según la extensión) para leerlo a mano.
+        Si se pasan las canciones, se incluye también su título."""
+        paleta = GeneradorBingoMusicalPride.PALETA_CELDAS
+        casillas = [f"f{fila + 1}c{col + 1}" for fila in range(5) for col in range(5) if (fila, col) != (2, 2)]
+        
+        def filas():
+            for numero in range(self.numero_inicial, self.numero_inicial + self.num_cartones):
+                indices, colores = self.carton(numero)
+                yield numero, [
+                    (casilla, indice + 1, canciones[indice] if canciones else None, paleta[color])
+                    for casilla, indice, color in zip(casillas, indices, colores)
+                ]
+        
+        if nombre_archivo.lower().endswith('.csv'):
+            with open(nombre_archivo, 'w', encoding='utf-8', newline='') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(['carton', 'casilla', 'cancion', 'titulo', 'color'])
+                for numero, celdas in filas():
+                    for casilla, cancion, titulo, color in celdas:
+                        escritor.writerow([numero, casilla, cancion, titulo or '', color])
+        else:
+            # JSON escrito cartón a cartón para no montar todo el documento en memoria
+            with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
+                cabecera = {
+                    'semilla': self.semilla,
+                    'huella_canciones': self.huella_canciones,
+                    'num_canciones': self.num_canciones,
+                    'num_cartones': self.num_cartones,
+                }
+                archivo.write(json.dumps(cabecera, ensure_ascii=False)[:-1] + ', "cartones": [\n')
+                for i, (numero, celdas) in enumerate(filas()):
+                    carton = {'carton': numero, 'casillas': [
+                        {'casilla': casilla, 'cancion': cancion, **({'titulo': titulo} if titulo else {}),
+                         'color': color}
+                        for casilla, cancion, titulo, color in celdas
+                    ]}
+                    archivo.write((",\n" if i else "") + json.dumps(carton, ensure_ascii=False))
+                archivo.write("\n]}\n")
+        return nombre_archivo
+    
+    def cerrar(self):
+        self.datos.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excepcion):
+        self.cerrar()
 
 def parse_arguments():
     """Configura y parsea los argumentos de línea de comandos"""
@@ -611,19 +2855,31 @@ def parse_arguments():
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     
-    # Grupo mutuamente excluyente para fuente de canciones
-    source_group = parser.add_mutually_exclusive_group(required=True)
+    # Fuentes de canciones (al menos una; se pueden repetir y combinar)
+    source_group = parser.add_argument_group('fuentes de canciones')
     
     source_group.add_argument(
         '-c', '--canciones',
         type=str,
-        help='Ruta al archivo de texto con las canciones'
+        nargs='+',
+        action='extend',
+        help='Ruta al archivo de texto con las canciones (admite varios)'
     )
     
     source_group.add_argument(
         '-s', '--spotify-playlist',
         type=str,
-        help='URL de la playlist de Spotify (ej: https://open.spotify.com/playlist/...)'
+        nargs='+',
+        action='extend',
+        help='URL de la playlist de Spotify (ej: https://open.spotify.com/playlist/...; admite varias)'
+    )
+    
+    source_group.add_argument(
+        '--muestra-canciones',
+        type=int,
+        metavar='N',
+        help='Usa solo N canciones elegidas al azar (y de forma reproducible con --semilla) entre '
+             'todas las fuentes, recorriendo los archivos en flujo sin cargarlos enteros'
     )
     
     # Credenciales de Spotify
@@ -653,6 +2909,39 @@ def parse_arguments():
         help='Máximo número de canciones a extraer de la playlist (por defecto: todas)'
     )
     
+    parser.add_argument(
+        '--descargas-paralelas',
+        type=int,
+        default=4,
+        help='Páginas de la playlist de Spotify que se descargan a la vez'
+    )
+    
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Usa solo la copia en caché de la playlist, sin conectarse a Spotify'
+    )
+    
+    parser.add_argument(
+        '--sin-cache',
+        action='store_true',
+        help='No guarda la playlist descargada en la caché local'
+    )
+    
+    parser.add_argument(
+        '--cache-dias',
+        type=int,
+        default=30,
+        help='Días sin usarse tras los que se borra una playlist de la caché'
+    )
+    
+    parser.add_argument(
+        '--cache-max-mb',
+        type=int,
+        default=100,
+        help='Tamaño máximo de la caché de playlists (se borran primero las usadas hace más tiempo)'
+    )
+    
     # Opciones generales
     parser.add_argument(
         '-n', '--num-cartones',
@@ -683,6 +2972,159 @@ def parse_arguments():
         help='Número de cartones por página (1, 2 o 4)'
     )
     
+    parser.add_argument(
+        '--motor',
+        type=str,
+        choices=['platypus', 'canvas'],
+        default='platypus',
+        help='Motor de renderizado: platypus (Table/Paragraph) o canvas (dibujo directo, mucho más rápido)'
+    )
+    
+    parser.add_argument(
+        '--ajustar-texto',
+        action='store_true',
+        help='Reduce la fuente solo en las celdas cuyo título no cabe (como mucho hasta --fuente)'
+    )
+    
+    parser.add_argument(
+        '--semilla',
+        type=int,
+        help='Semilla para reproducir exactamente la misma tirada de cartones'
+    )
+    
+    parser.add_argument(
+        '--cartones-unicos',
+        action='store_true',
+        help='Garantiza que no haya dos cartones iguales en la tirada'
+    )
+    
+    parser.add_argument(
+        '--distancia-minima',
+        type=int,
+        default=1,
+        help='Con --cartones-unicos, número mínimo de canciones distintas entre dos cartones cualesquiera'
+    )
+    
+    parser.add_argument(
+        '--equilibrar',
+        action='store_true',
+        help='Reparte las canciones por igual: cada una sale en el mismo número de cartones (±1)'
+    )
+    
+    parser.add_argument(
+        '--equilibrar-posiciones',
+        action='store_true',
+        help='Como --equilibrar, y además reparte por igual las filas y columnas en que sale cada canción'
+    )
+    
+    parser.add_argument(
+        '--matriz-cartones',
+        action='store_true',
+        help='Sortea los cartones de golpe con NumPy, por bloques de 4096 (mucho más rápido en '
+             'tiradas grandes; con la misma semilla sale otra tirada que sin esta opción)'
+    )
+    
+    parser.add_argument(
+        '--solo-carton',
+        type=int,
+        nargs='+',
+        metavar='N',
+        help='Regenera solo los cartones indicados de una tirada (requiere la misma --semilla y canciones)'
+    )
+    
+    parser.add_argument(
+        '--simular',
+        type=int,
+        metavar='PARTIDAS',
+        help='En lugar de generar el PDF, simula PARTIDAS partidas con estos cartones y muestra '
+             'cuántas canciones hacen falta hasta el primer ganador (requiere numpy)'
+    )
+    
+    parser.add_argument(
+        '--cantar',
+        action='store_true',
+        help='Abre la consola del presentador para introducir las canciones tocadas y '
+             'detectar al momento los cartones ganadores (usa la misma --semilla de la tirada)'
+    )
+    
+    parser.add_argument(
+        '--manifiesto',
+        type=str,
+        metavar='ARCHIVO',
+        help='Usa los cartones de un manifiesto ya generado (para --cantar, --simular o '
+             '--exportar-manifiesto) en lugar de regenerarlos'
+    )
+    
+    parser.add_argument(
+        '--continuar',
+        type=str,
+        metavar='MANIFIESTO',
+        help='Amplía una tirada ya impresa: genera -n cartones nuevos, numerados tras el último del '
+             'manifiesto y distintos de todos los anteriores, en un PDF aparte'
+    )
+    
+    parser.add_argument(
+        '--exportar-manifiesto',
+        type=str,
+        metavar='ARCHIVO',
+        help='Exporta el manifiesto de cartones a JSON o CSV (según la extensión) para leerlo a mano'
+    )
+    
+    parser.add_argument(
+        '--sin-manifiesto',
+        action='store_true',
+        help='No escribe el manifiesto binario de cartones junto al PDF'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Número de procesos para generar el PDF en paralelo (por fragmentos de páginas)'
+    )
+    
+    parser.add_argument(
+        '--paginas-por-lote',
+        type=int,
+        help='Genera el PDF por lotes de N páginas con memoria acotada (para tiradas muy grandes)'
+    )
+    
+    parser.add_argument(
+        '--dividir-salida',
+        action='store_true',
+        help='Con --workers, deja cada fragmento en su propio PDF en lugar de unirlos'
+    )
+    
+    parser.add_argument(
+        '--cache-paginas',
+        action='store_true',
+        help='Guarda en caché el contenido dibujado de cada página y, al repetir la tirada con la '
+             'misma --semilla, redibuja solo las páginas que han cambiado'
+    )
+    
+    parser.add_argument(
+        '--cache-paginas-max-mb',
+        type=int,
+        default=500,
+        help='Tamaño máximo de la caché de páginas (se borran primero las usadas hace más tiempo)'
+    )
+    
+    parser.add_argument(
+        '--perfil',
+        type=str,
+        metavar='ARCHIVO.json',
+        help='Guarda en JSON los tiempos de cada fase, llamadas a la API, pico de memoria, '
+             'cartones/s y páginas/s de la ejecución'
+    )
+    
+    parser.add_argument(
+        '--perfil-cprofile',
+        type=str,
+        metavar='ARCHIVO.prof',
+        help='Perfila con cProfile la generación del PDF y guarda las estadísticas '
+             '(ábrelas con python -m pstats o snakeviz; con --workers solo cubre el proceso principal)'
+    )
+    
     # Opciones de configuración
     parser.add_argument(
         '--guardar-canciones',
@@ -690,7 +3132,23 @@ def parse_arguments():
         help='Guardar las canciones extraídas de Spotify en un archivo de texto'
     )
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.canciones and not args.spotify_playlist:
+        parser.error("indica al menos una fuente de canciones: -c/--canciones o -s/--spotify-playlist")
+    if args.muestra_canciones is not None and args.muestra_canciones < 24:
+        parser.error("--muestra-canciones necesita al menos 24 canciones para llenar un cartón")
+    if args.offline and args.sin_cache:
+        parser.error("--offline usa la caché de playlists y no se combina con --sin-cache")
+    if args.cache_paginas and (args.workers > 1 or args.paginas_por_lote):
+        parser.error("--cache-paginas no se combina con --workers ni con --paginas-por-lote")
+    if args.continuar and (args.manifiesto or args.solo_carton or args.cantar or args.simular):
+        parser.error("--continuar no se combina con --manifiesto, --solo-carton, --cantar ni --simular")
+    if args.continuar and (args.equilibrar or args.equilibrar_posiciones):
+        parser.error("--continuar no se combina con --equilibrar (el reparto depende de toda la tirada)")
+    if args.continuar and (args.workers > 1 or args.paginas_por_lote or args.cache_paginas):
+        parser.error("--continuar genera solo los cartones nuevos y no se combina con --workers, "
+                     "--paginas-por-lote ni --cache-paginas")
+    return args
 
 def configurar_credenciales_spotify():
     """Guía interactiva para configurar credenciales de Spotify"""
@@ -716,6 +3174,8 @@ def configurar_credenciales_spotify():
 
 def main():
     """Función principal para ejecutar el generador con parámetros configurables"""
+    # Manifiestos abiertos con mmap: se cierran al salir, también si hay un error
+    manifiestos_abiertos = contextlib.ExitStack()
     try:
         args = parse_arguments()
         
@@ -723,19 +3183,22 @@ def main():
         print("🏳️‍🌈 Iniciando generador de Bingo Musical Pride MEJORADO con Spotify")
         print(f"📄 Configuración:")
         
-        # Determinar fuente de canciones
+        # Determinar fuentes de canciones (se pueden combinar varias playlists y archivos)
+        client_id = args.spotify_client_id
+        client_secret = args.spotify_client_secret
+        
         if args.spotify_playlist:
             print(f"  • Fuente: Playlist de Spotify")
-            print(f"  • URL de playlist: {args.spotify_playlist}")
+            for playlist in args.spotify_playlist:
+                print(f"  • URL de playlist: {playlist}")
             print(f"  • Incluir artista: {'Sí' if args.incluir_artista else 'No'}")
             if args.max_canciones_spotify:
                 print(f"  • Máximo de canciones: {args.max_canciones_spotify}")
+            if args.offline:
+                print(f"  • Modo offline: solo caché local")
             
             # Configurar credenciales de Spotify
-            client_id = args.spotify_client_id
-            client_secret = args.spotify_client_secret
-            
-            if not client_id or not client_secret:
+            if (not client_id or not client_secret) and not args.offline:
                 print("⚠️ No se proporcionaron credenciales de Spotify")
                 respuesta = input("¿Quieres configurarlas ahora? (s/n): ").lower()
                 if respuesta in ['s', 'sí', 'si', 'y', 'yes']:
@@ -746,54 +3209,270 @@ def main():
                 else:
                     print("❌ No se pueden obtener canciones de Spotify sin credenciales")
                     return
-            
-            # Crear generador con Spotify
-            generador = GeneradorBingoMusicalPride(
-                playlist_url=args.spotify_playlist,
-                spotify_client_id=client_id,
-                spotify_client_secret=client_secret,
-                tamaño_fuente=args.fuente,
-                cartones_por_pagina=args.por_pagina,
-                incluir_artista=args.incluir_artista,
-                max_canciones_spotify=args.max_canciones_spotify
-            )
-            
-            # Guardar canciones si se solicita
-            if args.guardar_canciones:
-                print(f"💾 Guardando canciones en: {args.guardar_canciones}")
-                with open(args.guardar_canciones, 'w', encoding='utf-8') as f:
-                    for cancion in generador.canciones:
-                        f.write(cancion + '\n')
-                print(f"✅ Se guardaron {len(generador.canciones)} canciones en {args.guardar_canciones}")
-            
-        else:
+        
+        if args.canciones:
             print(f"  • Fuente: Archivo de texto")
-            print(f"  • Archivo de canciones: {args.canciones}")
-            
-            # Crear generador con archivo
-            generador = GeneradorBingoMusicalPride(
-                ruta_canciones=args.canciones,
-                tamaño_fuente=args.fuente,
-                cartones_por_pagina=args.por_pagina
-            )
+            for ruta in args.canciones:
+                print(f"  • Archivo de canciones: {ruta}")
+        if args.muestra_canciones:
+            print(f"  • Muestra aleatoria: {args.muestra_canciones} canciones")
+        
+        # Crear generador (con varias fuentes se cargan en paralelo y sin duplicados)
+        generador = GeneradorBingoMusicalPride(
+            ruta_canciones=args.canciones,
+            playlist_url=args.spotify_playlist,
+            spotify_client_id=client_id,
+            spotify_client_secret=client_secret,
+            tamaño_fuente=args.fuente,
+            cartones_por_pagina=args.por_pagina,
+            incluir_artista=args.incluir_artista,
+            max_canciones_spotify=args.max_canciones_spotify,
+            descargas_paralelas=args.descargas_paralelas,
+            cache_playlists=CachePlaylists(ttl_dias=args.cache_dias, max_mb=args.cache_max_mb,
+                                           activa=not args.sin_cache),
+            offline=args.offline,
+            muestra_canciones=args.muestra_canciones,
+            matriz_cartones=args.matriz_cartones,
+            semilla=args.semilla,
+            ajustar_texto=args.ajustar_texto
+        )
+        
+        # Guardar canciones si se solicita
+        if args.guardar_canciones:
+            print(f"💾 Guardando canciones en: {args.guardar_canciones}")
+            with open(args.guardar_canciones, 'w', encoding='utf-8') as f:
+                for cancion in generador.canciones:
+                    f.write(cancion + '\n')
+            print(f"✅ Se guardaron {len(generador.canciones)} canciones en {args.guardar_canciones}")
         
         print(f"  • Cartones a generar: {args.num_cartones}")
         print(f"  • Cartones por página: {args.por_pagina}")
         print(f"  • Tamaño de fuente: {args.fuente}")
         print(f"  • Archivo de salida: {args.output}")
+        print(f"  • Motor de renderizado: {args.motor}")
+        if args.ajustar_texto:
+            print(f"  • Ajuste de texto por celda: Sí")
+        if args.matriz_cartones:
+            print(f"  • Sorteo de cartones: matriz NumPy por bloques")
+        if args.equilibrar or args.equilibrar_posiciones:
+            print(f"  • Reparto equilibrado de canciones: Sí{' (también por fila y columna)' if args.equilibrar_posiciones else ''}")
+        
+        if args.semilla is not None:
+            print(f"  • Semilla: {args.semilla} (huella de canciones: {generador.huella_canciones})")
+        if args.workers > 1:
+            print(f"  • Procesos: {args.workers}")
+        if args.cache_paginas:
+            print("  • Caché de páginas: Sí")
+            if args.semilla is None:
+                print("⚠️ Sin --semilla cada ejecución sortea cartones distintos y no reutilizará páginas")
         
-        # Generar PDF
-        archivo_generado = generador.generar_pdf(args.num_cartones, args.output)
+        # Ampliar una tirada ya impresa: misma semilla y numeración a continuación
+        continuacion = None
+        if args.continuar:
+            continuacion = manifiestos_abiertos.enter_context(ManifiestoCartones(args.continuar))
+            if continuacion.huella_canciones != generador.huella_canciones:
+                raise ValueError(
+                    f"El manifiesto '{args.continuar}' es de otra lista de canciones "
+                    f"(huella {continuacion.huella_canciones}, esperada {generador.huella_canciones})"
+                )
+            if args.semilla is not None and args.semilla != continuacion.semilla:
+                raise ValueError(f"La tirada de '{args.continuar}' usó la semilla {continuacion.semilla}, "
+                                 f"no {args.semilla}")
+            generador.semilla = continuacion.semilla
+            # Los cartones nuevos se sortean con los ajustes de la tirada original
+            if continuacion.ajustes_registrados:
+                distancia = continuacion.distancia_minima or 1
+                if args.distancia_minima > 1 and args.distancia_minima != distancia:
+                    raise ValueError(f"La tirada de '{args.continuar}' usó --distancia-minima {distancia}, "
+                                     f"no {args.distancia_minima}")
+                if args.matriz_cartones and not continuacion.matriz_cartones:
+                    raise ValueError(f"La tirada de '{args.continuar}' no usó --matriz-cartones")
+                args.distancia_minima = distancia
+                args.matriz_cartones = generador.matriz_cartones = continuacion.matriz_cartones
+                print(f"  • Ajustes heredados: distancia mínima {distancia}"
+                      f"{', matriz NumPy por bloques' if continuacion.matriz_cartones else ''}")
+                if continuacion.equilibrado:
+                    print("⚠️ La tirada original era equilibrada: los cartones nuevos no siguen su reparto")
+            else:
+                print(f"⚠️ '{args.continuar}' no guarda cómo se sortearon sus cartones: usa las mismas "
+                      f"--distancia-minima y --matriz-cartones que en la tirada original")
+            primero = continuacion.numero_inicial + len(continuacion)
+            ultimo = primero + args.num_cartones - 1
+            # Sin -o propio se escribiría encima del PDF de la tirada original
+            if os.path.abspath(ManifiestoCartones.ruta_para(args.output)) == os.path.abspath(args.continuar):
+                base, extension = os.path.splitext(args.output)
+                args.output = f"{base}_{primero:03d}-{ultimo:03d}{extension or '.pdf'}"
+            print(f"  • Continuación de: {args.continuar} (cartones #{continuacion.numero_inicial:03d}-"
+                  f"#{primero - 1:03d}, semilla {continuacion.semilla}); nuevos #{primero:03d}-#{ultimo:03d}")
+        
+        # El manifiesto solo sirve si la tirada se puede regenerar, así que lleva semilla
+        genera_pdf = not (args.simular or args.cantar or args.solo_carton or args.manifiesto)
+        if genera_pdf and not args.sin_manifiesto:
+            generador.asegurar_semilla()
+        
+        manifiesto = None
+        if args.manifiesto:
+            manifiesto = manifiestos_abiertos.enter_context(ManifiestoCartones(args.manifiesto))
+            if manifiesto.huella_canciones != generador.huella_canciones:
+                raise ValueError(
+                    f"El manifiesto '{args.manifiesto}' es de otra lista de canciones "
+                    f"(huella {manifiesto.huella_canciones}, esperada {generador.huella_canciones})"
+                )
+            print(f"  • Manifiesto: {args.manifiesto} ({len(manifiesto)} cartones, semilla {manifiesto.semilla})")
+        
+        # Sortear de antemano cartones equilibrados y/o sin repetidos (al continuar una tirada,
+        # siempre sin repetir ninguno de los ya impresos)
+        cartones_unicos = args.cartones_unicos or args.distancia_minima > 1 or continuacion is not None
+        cartones_a_preparar = max(args.solo_carton) if args.solo_carton else args.num_cartones
+        with generador.metricas.fase('preparacion_cartones'):
+            if continuacion:
+                generador.preparar_cartones_unicos(args.num_cartones, args.distancia_minima,
+                                                   primero=primero, anteriores=continuacion)
+            elif args.equilibrar or args.equilibrar_posiciones:
+                generador.preparar_cartones_equilibrados(
+                    cartones_a_preparar, por_posicion=args.equilibrar_posiciones,
+                    distancia_minima=args.distancia_minima if cartones_unicos else None
+                )
+            elif cartones_unicos:
+                generador.preparar_cartones_unicos(cartones_a_preparar, args.distancia_minima)
         
+        # Simular partidas con los mismos cartones que se imprimirían
+        if args.simular:
+            if args.semilla is None and manifiesto is None:
+                print("⚠️ Sin --semilla, los cartones simulados no coincidirán con los de otra ejecución")
+            cartones = list(manifiesto) if manifiesto else generador.fijar_cartones(args.num_cartones)
+            simulador = SimuladorPartidas(cartones, len(generador.canciones))
+            inicio = time.perf_counter()
+            with generador.metricas.fase('simulacion'):
+                resultados = simulador.simular(args.simular, semilla=args.semilla)
+            simulador.mostrar_resumen(simulador.resumen(resultados), args.simular)
+            print(f"⏱️ Simulación completada en {time.perf_counter() - inicio:.1f} s")
+            if args.perfil:
+                generador.metricas.guardar(args.perfil, partidas=args.simular)
+                print(f"📈 Perfil guardado en '{args.perfil}'")
+            return
+        
+        # Consola del presentador durante la partida
+        if args.cantar:
+            if manifiesto:
+                consola_cantor(generador, manifiesto, manifiesto.numero_inicial)
+                return
+            if args.semilla is None:
+                raise ValueError("--cantar necesita la --semilla de la tirada impresa o su --manifiesto")
+            consola_cantor(generador, generador.fijar_cartones(args.num_cartones))
+            return
+        
+        # Exportar un manifiesto existente sin generar nada
+        if manifiesto:
+            if not args.exportar_manifiesto:
+                raise ValueError("Con --manifiesto indica --cantar, --simular o --exportar-manifiesto")
+            manifiesto.exportar(args.exportar_manifiesto, generador.canciones)
+            print(f"📤 Manifiesto exportado a '{args.exportar_manifiesto}'")
+            return
+        
+        # Reimprimir cartones sueltos de una tirada con semilla
+        if args.solo_carton:
+            if args.semilla is None:
+                raise ValueError("--solo-carton necesita la --semilla de la tirada original")
+            for numero in args.solo_carton:
+                generador.mostrar_carton(numero)
+            generador.generar_pdf_cartones(args.solo_carton, args.output, motor=args.motor)
+            print(f"\n🖨️ Cartones {', '.join(f'#{n:03d}' for n in args.solo_carton)} regenerados en '{args.output}'")
+            return
+        
+        # Generar PDF (cProfile solo envuelve esta fase, que es donde se va el tiempo)
+        perfilador = None
+        if args.perfil_cprofile:
+            import cProfile
+            perfilador = cProfile.Profile()
+        with generador.metricas.fase('generacion_pdf'):
+            if perfilador:
+                perfilador.enable()
+            try:
+                if continuacion:
+                    archivo_generado = generador.generar_pdf_cartones(
+                        list(range(primero, ultimo + 1)), args.output, motor=args.motor
+                    )
+                elif args.workers > 1:
+                    archivo_generado = generador.generar_pdf_paralelo(
+                        args.num_cartones, args.output, motor=args.motor,
+                        workers=args.workers, dividir_salida=args.dividir_salida
+                    )
+                elif args.paginas_por_lote:
+                    archivo_generado = generador.generar_pdf_por_lotes(
+                        args.num_cartones, args.output, motor=args.motor,
+                        paginas_por_lote=args.paginas_por_lote
+                    )
+                elif args.cache_paginas:
+                    archivo_generado = generador.generar_pdf_incremental(
+                        args.num_cartones, args.output, motor=args.motor,
+                        cache=CachePaginas(max_mb=args.cache_paginas_max_mb)
+                    )
+                else:
+                    archivo_generado = generador.generar_pdf(args.num_cartones, args.output, motor=args.motor)
+            finally:
+                if perfilador:
+                    perfilador.disable()
+                    perfilador.dump_stats(args.perfil_cprofile)
+        
+        archivos_pdf = archivo_generado if isinstance(archivo_generado, list) else [archivo_generado]
+        archivo_generado = ', '.join(archivos_pdf)
         num_paginas = (args.num_cartones + args.por_pagina - 1) // args.por_pagina
+        generador.metricas.contar('cartones', args.num_cartones)
+        generador.metricas.contar('paginas', num_paginas)
+        generador.metricas.contar('bytes_pdf', sum(os.path.getsize(archivo) for archivo in archivos_pdf))
+        
+        # Manifiesto de cartones junto al PDF
+        archivo_manifiesto = None
+        if not args.sin_manifiesto:
+            with generador.metricas.fase('manifiesto'):
+                # Al continuar, el manifiesto nuevo cubre la tirada completa (anteriores y nuevos)
+                archivo_manifiesto = ManifiestoCartones.escribir(
+                    ManifiestoCartones.ruta_para(args.output), generador, args.num_cartones,
+                    anterior=continuacion
+                )
+                if args.exportar_manifiesto:
+                    with ManifiestoCartones(archivo_manifiesto) as manifiesto:
+                        manifiesto.exportar(args.exportar_manifiesto, generador.canciones)
         
         print(f"\n🎊 ¡Proceso completado con éxito!")
         print(f"📁 Archivo generado: {archivo_generado}")
+        if archivo_manifiesto:
+            print(f"🗂️ Manifiesto de cartones: {archivo_manifiesto}")
+        if args.exportar_manifiesto and archivo_manifiesto:
+            print(f"📤 Manifiesto exportado a '{args.exportar_manifiesto}'")
         print(f"🏳️‍🌈 Cartones Pride generados: {args.num_cartones}")
+        if continuacion:
+            print(f"🔢 Numeración: #{primero:03d}-#{ultimo:03d}, a continuación de '{args.continuar}'")
         print(f"📄 Páginas utilizadas: {num_paginas}")
         print(f"🎵 Canciones disponibles: {len(generador.canciones)}")
         print(f"🎯 Fuente de canciones: {generador.nombre_fuente}")
+        if generador.canciones_catalogo is not None:
+            print(f"🎲 Muestra de {len(generador.canciones)} canciones entre {generador.canciones_catalogo} "
+                  f"(semilla {generador.semilla})")
+        if len(generador.resumen_fuentes) > 1:
+            for nombre, cargadas, añadidas in generador.resumen_fuentes:
+                print(f"   • {nombre}: {cargadas} canciones ({añadidas} nuevas)")
+            print(f"🔁 Duplicados descartados: {generador.canciones_duplicadas}")
+        if args.spotify_playlist:
+            cache = generador.spotify_extractor.cache
+            print(f"💾 Caché de playlists: {cache.aciertos} aciertos, {cache.fallos} fallos "
+                  f"({cache.paginas_reutilizadas} páginas reutilizadas)")
+        if cartones_unicos:
+            print(f"🧮 Candidatos rechazados por repetidos: {generador.candidatos_rechazados}")
         print(f"♻️ Papel ahorrado vs 1 por página: {args.num_cartones - num_paginas} páginas")
+        if args.perfil:
+            resumen = generador.metricas.guardar(
+                args.perfil, motor=args.motor, por_pagina=args.por_pagina, workers=args.workers,
+                paginas_por_lote=args.paginas_por_lote
+            )
+            print(f"📈 Perfil guardado en '{args.perfil}':")
+            for fase, segundos in resumen['fases_s'].items():
+                print(f"   • {fase}: {segundos:.2f} s")
+            if 'cartones_por_s' in resumen:
+                print(f"   • {resumen['cartones_por_s']:.1f} cartones/s, {resumen['paginas_por_s']:.1f} páginas/s")
+        if args.perfil_cprofile:
+            print(f"🔬 Perfil de cProfile en '{args.perfil_cprofile}' (python -m pstats {args.perfil_cprofile})")
         print(f"💖 ¡Listo para celebrar la diversidad con música! 🌈")
         
     except KeyboardInterrupt:
@@ -810,8 +3489,10 @@ def main():
             print("- Asegúrate de que el archivo de canciones existe")
             print("- Verifica que hay al menos 24 canciones disponibles")
             print("- Instala las librerías necesarias:")
-            print("  pip install reportlab pandas spotipy requests")
+            print("  pip install reportlab (y spotipy requests para Spotify)")
         print("- Usa --help para ver todas las opciones disponibles")
+    finally:
+        manifiestos_abiertos.close()
 
 def ejemplo_uso():
     """Muestra ejemplos de uso del script"""
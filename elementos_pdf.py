@@ -0,0 +1,73 @@
+"""Elementos de platypus propios de bingo.py. Van en un módulo aparte porque heredan de
+clases de reportlab: bingo.py lo importa solo al maquetar el PDF (así --help no carga
+reportlab) y, al estar definidos a nivel de módulo, se pueden serializar con pickle."""
+from reportlab.platypus import Flowable, Paragraph
+
+
+class ParrafoCacheado(Paragraph):
+    """Paragraph que se puede colocar en muchas celdas a la vez: el marcado se analiza
+    una sola vez al crearlo y el partido en líneas se repite solo si cambia el ancho"""
+
+    ancho_maquetado = None
+
+    def wrap(self, availWidth, availHeight):
+        if availWidth != self.ancho_maquetado:
+            self.medidas = super().wrap(availWidth, availHeight)
+            self.ancho_maquetado = availWidth
+        return self.medidas
+
+
+class CartonConMarco(Flowable):
+    """Cartón cuya parte común a todos (título, rejilla y casilla libre) se dibuja una sola
+    vez por documento como Form XObject y aquí solo se referencia con doForm. Debajo del
+    título apila, como lo haría el Frame, los flowables propios del cartón (número y tabla
+    sin rejilla), que no llevan spaceBefore. Si el cartón no cabe entero en la hoja, se
+    parte en los flowables de siempre para que platypus lo reparta igual que antes."""
+
+    def __init__(self, nombre_marco, titulo, tabla_marco, propios, completos):
+        super().__init__()
+        self.nombre_marco = nombre_marco
+        self.titulo = titulo
+        self.tabla_marco = tabla_marco
+        self.propios = propios
+        self.completos = completos  # Función que devuelve los flowables de siempre
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        self.alto_titulo = self.titulo.wrap(availWidth, availHeight)[1]
+        # Posición de cada flowable propio: x y distancia desde arriba hasta su base
+        self.posiciones = []
+        y = self.alto_titulo + self.titulo.getSpaceAfter()
+        for flowable in self.propios:
+            ancho, alto = flowable.wrap(availWidth, availHeight)
+            y += alto
+            self.posiciones.append(((availWidth - ancho) / 2, y))
+            y += flowable.getSpaceAfter()
+        self.spaceAfter = self.propios[-1].getSpaceAfter()
+        self.height = y - self.spaceAfter
+        self.tabla_marco.wrap(availWidth, availHeight)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        completos = self.completos()
+        if completos[0].wrap(availWidth, availHeight)[1] > availHeight:
+            return []
+        return completos
+
+    def definir_marco(self, canv):
+        """Dibuja el título y la tabla del marco en el Form XObject (una vez por documento)"""
+        if canv.hasForm(self.nombre_marco):
+            return
+        # Margen para el grosor de la rejilla, que sobresale de la tabla
+        canv.beginForm(self.nombre_marco, lowerx=-2, lowery=-2, upperx=self.width + 2, uppery=self.height + 2)
+        self.titulo.drawOn(canv, 0, self.height - self.alto_titulo)
+        x, y = self.posiciones[-1]
+        self.tabla_marco.drawOn(canv, x, self.height - y)
+        canv.endForm()
+
+    def draw(self):
+        canv = self.canv
+        for flowable, (x, y) in zip(self.propios, self.posiciones):
+            flowable.drawOn(canv, x, self.height - y)
+        self.definir_marco(canv)
+        canv.doForm(self.nombre_marco)